@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from carregamento_dados import DIRETORIO_CACHE
+from perfil_execucao import etapa, formato
+from preprocessamento import ATRIBUTO_VERSAO, COLUNA_ID
+
+# Predefinições de agrupamentos salvas pelos usuários, por posição:
+# {posição: {nome da predefinição: {nome do agrupamento: [colunas]}}}
+CAMINHO_PREDEFINICOES = os.environ.get('BRAGANTINO_AGRUPAMENTOS', os.path.join(DIRETORIO_CACHE, 'agrupamentos.json'))
+
+# Modelos ajustados recentemente (LRU), para que reruns com os mesmos agrupamentos (ex.: ao
+# mexer nos pesos) não reajustem o PCA: {(hash dos dados, agrupamentos): ModeloAgrupamentos}.
+# O hash dos valores identifica a posição e a versão dos dados sem depender de quem chama.
+_MAX_MODELOS = 16
+_modelos = OrderedDict()
+_trava = threading.Lock()
+_trava_predefinicoes = threading.Lock()
+
+# Colunas de identificação que o resultado do PCA sempre tem; um agrupamento com um desses
+# nomes as sobrescreveria
+COLUNAS_RESERVADAS = [COLUNA_ID, 'Nome do jogador']
+
+# Nomes de agrupamentos que coincidem com as colunas reservadas ou com as colunas informadas
+# (ex.: as métricas da página, que seriam confundidas com o agrupamento)
+def nomes_invalidos(agrupamentos, colunas=()):
+    existentes = set(COLUNAS_RESERVADAS) | set(colunas)
+    return [nome for nome in agrupamentos if nome in existentes]
+
+# Primeiro componente principal de todos os agrupamentos de uma vez: uma padronização das
+# colunas usadas (como o StandardScaler), uma matriz de covariância dessas colunas e uma
+# decomposição em lote dos blocos de cada agrupamento (como o PCA com svd_solver=
+# 'covariance_eigh', inclusive no sinal). Cada componente é reescalado para [a, 1].
+# Guarda os componentes dos jogadores do ajuste e transforma novos jogadores na mesma escala.
+class ModeloAgrupamentos:
+    def __init__(self, agrupamentos, a=0.01):
+        self.agrupamentos = {nome: list(colunas) for nome, colunas in agrupamentos.items() if colunas}
+        self.colunas = list(dict.fromkeys(col for colunas in self.agrupamentos.values() for col in colunas))
+        self.a = a
+
+    def _padronizar(self, df):
+        return (df[self.colunas].to_numpy(dtype=float) - self.media) / self.escala
+
+    def _escalar(self, componentes):
+        amplitude = self.maximos - self.minimos
+        with np.errstate(divide='ignore', invalid='ignore'):
+            escalados = self.a + ((componentes - self.minimos) / amplitude) * (1 - self.a)
+        escalados[:, amplitude == 0] = self.a
+        return escalados
+
+    # Aceita a tabela ou a matriz já extraída das colunas dos agrupamentos (self.colunas)
+    def ajustar(self, df):
+        valores = df[self.colunas].to_numpy(dtype=float) if isinstance(df, pd.DataFrame) else df
+        self.media = valores.mean(axis=0)
+        escala = valores.std(axis=0)
+        # Colunas constantes não são divididas (mesmo critério do StandardScaler)
+        escala[escala < 10 * np.finfo(float).eps] = 1.0
+        self.escala = escala
+        padronizados = (valores - self.media) / self.escala
+        covariancia = padronizados.T @ padronizados
+
+        # Blocos de covariância de cada agrupamento, completados com zeros até o maior tamanho,
+        # decompostos em uma chamada; o último autovetor é o de maior autovalor
+        indices = {col: i for i, col in enumerate(self.colunas)}
+        posicoes = [[indices[col] for col in colunas] for colunas in self.agrupamentos.values()]
+        tamanho = max(len(p) for p in posicoes)
+        blocos = np.zeros((len(posicoes), tamanho, tamanho))
+        for g, p in enumerate(posicoes):
+            blocos[g, :len(p), :len(p)] = covariancia[np.ix_(p, p)]
+        _, autovetores = np.linalg.eigh(blocos)
+
+        # Pesos de cada agrupamento nas colunas padronizadas, com o sinal do PCA do
+        # scikit-learn (maior carga em módulo positiva)
+        self.pesos = np.zeros((len(self.colunas), len(posicoes)))
+        for g, p in enumerate(posicoes):
+            vetor = autovetores[g, :len(p), -1]
+            self.pesos[p, g] = vetor * np.sign(vetor[np.argmax(np.abs(vetor))] or 1.0)
+
+        componentes = padronizados @ self.pesos
+        self.minimos = componentes.min(axis=0)
+        self.maximos = componentes.max(axis=0)
+        self.componentes = self._escalar(componentes)
+        return self
+
+    # Componentes reescalados de novos jogadores: {nome do agrupamento: array}
+    def transformar(self, df):
+        componentes = self._escalar(self._padronizar(df) @ self.pesos)
+        return dict(zip(self.agrupamentos, componentes.T))
+
+# Modelo ajustado dos agrupamentos (do cache, se os mesmos dados já foram ajustados)
+def obter_modelo(df, agrupamentos):
+    modelo = ModeloAgrupamentos(agrupamentos)
+    valores = np.ascontiguousarray(df[modelo.colunas].to_numpy(dtype=float))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(memoryview(valores))
+    chave = (h.hexdigest(), tuple((nome, tuple(colunas)) for nome, colunas in modelo.agrupamentos.items()))
+    with _trava:
+        if chave in _modelos:
+            _modelos.move_to_end(chave)
+            with etapa('ajustar_agrupamento', cache='hit', agrupamentos=len(modelo.agrupamentos)):
+                return _modelos[chave]
+    with etapa('ajustar_agrupamento', cache='miss', agrupamentos=len(modelo.agrupamentos),
+               **formato(valores)):
+        modelo.ajustar(valores)
+    with _trava:
+        _modelos[chave] = modelo
+        while len(_modelos) > _MAX_MODELOS:
+            _modelos.popitem(last=False)
+    return modelo
+
+# Função para aplicar PCA: uma coluna por agrupamento não vazio, com o primeiro componente
+# principal reescalado para [0.01, 1] (n_components é mantido por compatibilidade; só o
+# primeiro componente é usado). A versão da tabela, se houver, passa a incluir os agrupamentos.
+def aplicar_pca(df, agrupamentos, n_components=1):
+    invalidos = nomes_invalidos(agrupamentos)
+    if invalidos:
+        raise ValueError(f'Nomes de agrupamento reservados para a identificação dos jogadores: {invalidos}')
+    pca_result = df[[COLUNA_ID, 'Nome do jogador']].copy()
+    if not any(agrupamentos.values()):
+        return pca_result
+    modelo = obter_modelo(df, agrupamentos)
+    componentes = pd.DataFrame(modelo.componentes, index=pca_result.index, columns=list(modelo.agrupamentos))
+    resultado = pd.concat([pca_result, componentes], axis=1)
+    resultado.attrs.pop(ATRIBUTO_VERSAO, None)
+    if ATRIBUTO_VERSAO in df.attrs:
+        definicao = json.dumps(modelo.agrupamentos, ensure_ascii=False, sort_keys=True)
+        resultado.attrs[ATRIBUTO_VERSAO] = f'{df.attrs[ATRIBUTO_VERSAO]}|pca:{definicao}'
+    return resultado
+
+# Predefinições de agrupamentos salvas para uma posição: {nome: {agrupamento: [colunas]}}
+def ler_predefinicoes(posicao):
+    if not os.path.exists(CAMINHO_PREDEFINICOES):
+        return {}
+    with open(CAMINHO_PREDEFINICOES, encoding='utf-8') as f:
+        return json.load(f).get(posicao, {})
+
+# Salva (ou substitui) uma predefinição de agrupamentos da posição; agrupamentos vazios são descartados
+def salvar_predefinicao(posicao, nome, agrupamentos):
+    with _trava_predefinicoes:
+        predefinicoes = {}
+        if os.path.exists(CAMINHO_PREDEFINICOES):
+            with open(CAMINHO_PREDEFINICOES, encoding='utf-8') as f:
+                predefinicoes = json.load(f)
+        predefinicoes.setdefault(posicao, {})[nome] = {
+            agrupamento: list(colunas) for agrupamento, colunas in agrupamentos.items() if colunas
+        }
+        os.makedirs(os.path.dirname(CAMINHO_PREDEFINICOES) or '.', exist_ok=True)
+        temporario = f'{CAMINHO_PREDEFINICOES}.{os.getpid()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(predefinicoes, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, CAMINHO_PREDEFINICOES)
@@ -0,0 +1,142 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+import agrupamento
+from agrupamento import aplicar_pca
+from consultas import adicionar_jogador_maximo, COLUNAS_REMOVIDAS_MULTIPLOS, JOGADOR_MAXIMO
+from esquema import aplicar_esquema
+from gerador_dados import gerar_fontes
+from motor_similaridade import calcular_metricas, calcular_similaridades
+from preprocessamento import COLUNA_ID, normalize_df, preparar_fontes, preparar_posicao
+
+# Benchmarks das etapas do pipeline sobre dados sintéticos. Uso:
+#   python Projeto-site/benchmark.py --jogadores 1000 10000 200000 --metricas 20 100 300 --saida resultado.json
+#   python Projeto-site/benchmark.py ... --comparar resultado_anterior.json
+
+POSICAO = 'Meio-campista'
+
+# Mede o melhor tempo entre as repetições e o pico de memória alocada (tracemalloc) de uma etapa
+def medir(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'segundos': min(tempos), 'pico_memoria_mb': pico / 2 ** 20}, resultado
+
+# Executa todas as etapas para um tamanho de base e devolve uma linha de resultado por etapa
+def executar_cenario(n_jogadores, n_metricas, n_colunas_consulta=12, repeticoes=3, semente=0):
+    fontes = gerar_fontes(n_jogadores, n_metricas, semente)
+    linhas = []
+
+    def registrar(etapa, funcao, **extras):
+        medida, resultado = medir(funcao, repeticoes)
+        linhas.append({'etapa': etapa, 'jogadores': n_jogadores, 'metricas': n_metricas, **extras, **medida})
+        return resultado
+
+    # Esquema dos dados aplicado a todas as fontes, como na leitura dos CSVs (as ligas
+    # estrangeiras sintéticas têm '-' em colunas numéricas)
+    fontes_tipadas = registrar('aplicar_esquema', lambda: {nome: aplicar_esquema(df)[0] for nome, df in fontes.items()},
+                               linhas_tabela=sum(map(len, fontes.values())))
+    fontes_preparadas = registrar('preparar_fontes', lambda: preparar_fontes({nome: df.copy() for nome, df in fontes_tipadas.items()}))
+    jogadores = pd.concat(fontes_preparadas['jogadores'], ignore_index=True)
+    registrar('normalize_df', lambda: normalize_df(jogadores), linhas_tabela=len(jogadores))
+    df_final = registrar('preparar_posicao', lambda: preparar_posicao(fontes_preparadas, POSICAO))
+
+    # Consultas sobre as colunas de métricas da posição
+    colunas_metricas = [col for col in df_final.select_dtypes(include='number').columns
+                        if col not in COLUNAS_REMOVIDAS_MULTIPLOS]
+    colunas = colunas_metricas[:n_colunas_consulta] if n_colunas_consulta else colunas_metricas
+    pesos = {col: 1 for col in colunas}
+    df_normalized = df_final[[COLUNA_ID, 'Nome do jogador'] + colunas]
+    ids = df_normalized[COLUNA_ID].tolist()
+    extras = {'linhas_tabela': len(df_normalized), 'colunas_consulta': len(colunas)}
+
+    matriz = df_normalized[colunas].to_numpy(dtype=float)
+    registrar('calcular_metricas', lambda: calcular_metricas(matriz[0], matriz[1:], np.ones(len(colunas))), **extras)
+    # Sem o cache de consultas preparadas: as repetições medem o cálculo, e não acertos no cache
+    registrar('consulta_um_jogador', lambda: calcular_similaridades(df_normalized, ids[0], pesos, cache=False), **extras)
+    registrar('consulta_multiplos_jogadores', lambda: calcular_similaridades(
+        df_normalized, ids[:5], pesos, cache=False), **extras)
+    registrar('consulta_classificacao', lambda: calcular_similaridades(
+        adicionar_jogador_maximo(df_normalized), JOGADOR_MAXIMO, pesos, coluna_total='Classificação', cache=False),
+        **extras)
+
+    metade = len(colunas) // 2
+    agrupamentos = {'Agrupamento 1': colunas[:metade], 'Agrupamento 2': colunas[metade:]}
+
+    # Cada repetição ajusta o modelo de novo (sem o LRU de modelos de obter_modelo); o reuso
+    # do modelo ajustado, como nos reruns da página, é medido à parte
+    def pca_sem_cache():
+        agrupamento._modelos.clear()
+        return aplicar_pca(df_normalized, agrupamentos)
+
+    registrar('aplicar_pca', pca_sem_cache, **extras)
+    registrar('aplicar_pca_modelo_em_cache', lambda: aplicar_pca(df_normalized, agrupamentos), **extras)
+    return linhas
+
+def _versao_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Tabela comparando os tempos com um resultado anterior (razão < 1 significa mais rápido agora)
+def comparar(resultados, arquivo_anterior):
+    with open(arquivo_anterior, encoding='utf-8') as f:
+        anterior = pd.DataFrame(json.load(f)['resultados'])
+    atual = pd.DataFrame(resultados)
+    chaves = ['etapa', 'jogadores', 'metricas']
+    df = atual.merge(anterior[chaves + ['segundos', 'pico_memoria_mb']], on=chaves, suffixes=('', '_anterior'))
+    df['razao_tempo'] = df['segundos'] / df['segundos_anterior']
+    df['razao_memoria'] = df['pico_memoria_mb'] / df['pico_memoria_mb_anterior']
+    return df[chaves + ['segundos_anterior', 'segundos', 'razao_tempo', 'razao_memoria']]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do pipeline de similaridade com dados sintéticos.')
+    parser.add_argument('--jogadores', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--metricas', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--colunas-consulta', type=int, default=12, help='Colunas usadas nas consultas (0 = todas)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help='Arquivo JSON para gravar os resultados')
+    parser.add_argument('--comparar', help='Arquivo JSON de uma execução anterior')
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for n_jogadores in args.jogadores:
+        for n_metricas in args.metricas:
+            resultados += executar_cenario(n_jogadores, n_metricas, args.colunas_consulta, args.repeticoes)
+
+    with pd.option_context('display.width', 200, 'display.max_rows', None):
+        print(pd.DataFrame(resultados).round(4).to_string(index=False))
+        if args.comparar:
+            print()
+            print(comparar(resultados, args.comparar).round(3).to_string(index=False))
+
+    if args.saida:
+        ambiente = {
+            'versao_codigo': _versao_codigo(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scikit-learn': sklearn.__version__,
+            'maquina': platform.machine(),
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'ambiente': ambiente, 'resultados': resultados}, f, ensure_ascii=False, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from motor_similaridade import _separar_consulta, calcular_similaridades, posicoes_jogadores
+from perfil_execucao import etapa, formato
+from preprocessamento import ATRIBUTO_VERSAO
+
+# Métricas suportadas pelo índice e número padrão de partições consultadas
+METRICAS_INDICE = ['euclidiana', 'manhattan', 'cosseno']
+N_SONDAS_PADRAO = 8
+# Abaixo deste tamanho a busca exata é mais rápida que construir o índice
+MIN_JOGADORES_INDICE = 2000
+
+# Índices construídos recentemente: um por versão dos dados, colunas e métrica (os pesos só
+# entram na consulta, então mudar os pesos não reconstrói o índice)
+_indices = OrderedDict()
+_MAX_INDICES = 8
+_trava = threading.Lock()
+
+# Aplica os pesos e, para o cosseno, normaliza as linhas (a distância euclidiana entre
+# vetores unitários ordena os jogadores da mesma forma que a similaridade cosseno)
+def _preparar_vetores(matriz, pesos, metrica):
+    vetores = np.asarray(matriz, dtype=float) * np.asarray(pesos, dtype=float)
+    if metrica == 'cosseno':
+        normas = np.linalg.norm(vetores, axis=-1, keepdims=True)
+        vetores = np.divide(vetores, normas, out=np.zeros_like(vetores), where=normas != 0)
+    return vetores
+
+def _distancias(vetores, consulta, metrica):
+    diferencas = vetores - consulta
+    if metrica == 'manhattan':
+        return np.abs(diferencas).sum(axis=-1)
+    return np.sqrt(np.einsum('...j,...j->...', diferencas, diferencas))
+
+# Índice por partições (estilo IVF): os jogadores são agrupados por k-means sobre a matriz
+# normalizada sem pesos, e a busca examina apenas as n_sondas partições mais próximas da
+# consulta. Os pesos de cada consulta são aplicados à consulta e aos centroides na escolha
+# das partições e aos candidatos na seleção dos n_candidatos mais próximos.
+class IndiceIVF:
+    def __init__(self, matriz, metrica='euclidiana', n_listas=None, semente=0):
+        if metrica not in METRICAS_INDICE:
+            raise ValueError(f'Métrica não suportada pelo índice: {metrica}')
+        self.metrica = metrica
+        self.matriz = np.asarray(matriz, dtype=float)
+        vetores = _preparar_vetores(self.matriz, 1.0, metrica)
+
+        n = len(vetores)
+        n_listas = n_listas or max(1, int(np.sqrt(n)))
+        n_listas = min(n_listas, n)
+        kmeans = KMeans(n_clusters=n_listas, n_init=1, random_state=semente).fit(vetores)
+        self.centroides = kmeans.cluster_centers_
+
+        # Posições dos jogadores de cada partição, em um único array ordenado por partição
+        rotulos = kmeans.labels_
+        self.ordem = np.argsort(rotulos, kind='stable')
+        self.inicios = np.searchsorted(rotulos[self.ordem], np.arange(n_listas + 1))
+
+    # Posições (linhas da matriz) dos candidatos mais próximos da consulta com os pesos dados
+    def candidatos(self, consulta, pesos, n_sondas=N_SONDAS_PADRAO, n_candidatos=None):
+        pesos = np.asarray(pesos, dtype=float)
+        consulta = _preparar_vetores(np.asarray(consulta, dtype=float)[None, :], pesos, self.metrica)[0]
+        centroides = _preparar_vetores(self.centroides, pesos, self.metrica)
+        n_sondas = min(n_sondas, len(self.centroides))
+        sondas = np.argpartition(_distancias(centroides, consulta, self.metrica), n_sondas - 1)[:n_sondas]
+        posicoes = np.concatenate([self.ordem[self.inicios[s]:self.inicios[s + 1]] for s in sondas])
+
+        # Opcionalmente mantém só os n_candidatos mais próximos dentro das partições visitadas
+        if n_candidatos is not None and len(posicoes) > n_candidatos:
+            vetores = _preparar_vetores(self.matriz[posicoes], pesos, self.metrica)
+            distancias = _distancias(vetores, consulta, self.metrica)
+            posicoes = posicoes[np.argpartition(distancias, n_candidatos - 1)[:n_candidatos]]
+        return np.sort(posicoes)
+
+# Chave do índice: a versão da tabela (DataFrame.attrs) e as colunas; sem versão, o hash dos valores
+def _chave_indice(df_normalized, matriz, metrica, n_listas):
+    versao = df_normalized.attrs.get(ATRIBUTO_VERSAO)
+    if versao is not None:
+        return versao, tuple(df_normalized.columns), matriz.shape, metrica, n_listas
+    h = hashlib.blake2b(np.ascontiguousarray(matriz, dtype=float).tobytes(), digest_size=16)
+    return h.hexdigest(), matriz.shape, metrica, n_listas
+
+# Índice das colunas numéricas da tabela, reaproveitado entre consultas da mesma versão dos dados
+def obter_indice(df_normalized, metrica='euclidiana', n_listas=None):
+    matriz = df_normalized.select_dtypes(include='number').to_numpy(dtype=float)
+    chave = _chave_indice(df_normalized, matriz, metrica, n_listas)
+    with _trava:
+        if chave in _indices:
+            _indices.move_to_end(chave)
+            return _indices[chave]
+    # Índice ainda não construído para estes dados: aparece como etapa própria no perfil
+    with etapa('construir_indice_ivf', metrica=metrica, cache='miss', **formato(matriz)):
+        indice = IndiceIVF(matriz, metrica, n_listas)
+    with _trava:
+        _indices[chave] = indice
+        while len(_indices) > _MAX_INDICES:
+            _indices.popitem(last=False)
+    return indice
+
+# Mesma saída de calcular_similaridades, mas as seis similaridades são calculadas apenas
+# sobre os candidatos retornados pelo índice. As similaridades baseadas em distância são
+# normalizadas pela maior distância entre os candidatos, e não entre todos os jogadores.
+def calcular_similaridades_aproximadas(df_normalized, jogadores_escolhidos, pesos, metrica='euclidiana',
+                                       n_sondas=N_SONDAS_PADRAO, n_candidatos=None,
+                                       coluna_total='Similaridade Total', n=None):
+    if len(df_normalized) < MIN_JOGADORES_INDICE:
+        return calcular_similaridades(df_normalized, jogadores_escolhidos, pesos, coluna_total, n)
+
+    consulta, _, numeric_columns = _separar_consulta(df_normalized, jogadores_escolhidos)
+    with etapa('busca_aproximada', metrica=metrica, linhas=len(df_normalized), colunas=len(numeric_columns)) as registro:
+        indice = obter_indice(df_normalized, metrica)
+        selecionados = np.zeros(len(df_normalized), dtype=bool)
+        selecionados[indice.candidatos(consulta, [pesos[col] for col in numeric_columns], n_sondas, n_candidatos)] = True
+        registro['candidatos'] = int(selecionados.sum())
+    # O(s) jogador(es) escolhido(s) precisam estar presentes para definir a consulta
+    escolhidos = [jogadores_escolhidos] if isinstance(jogadores_escolhidos, str) else jogadores_escolhidos
+    selecionados[posicoes_jogadores(df_normalized, escolhidos)] = True
+    # Os candidatos mudam a cada consulta e pesos: não vale guardar a consulta preparada
+    return calcular_similaridades(df_normalized[selecionados], jogadores_escolhidos, pesos, coluna_total, n,
+                                  cache=False)
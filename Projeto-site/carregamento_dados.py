@@ -0,0 +1,333 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from esquema import (
+    ESQUEMA, VERSAO_ESQUEMA, colunas_ausentes, colunas_nao_numericas, colunas_texto, converter_numeros,
+    preencher_faltantes, tipos_leitura, usar_coluna
+)
+from ligas import fontes_manifesto
+from perfil_execucao import com_contexto, etapa, formato
+
+# URLs diretas para os arquivos CSV (conteúdo bruto) das ligas do manifesto (ligas.json);
+# a base pode apontar para um servidor local
+URL_BASE = os.environ.get('BRAGANTINO_URL_BASE', 'https://raw.githubusercontent.com/gcarbs1/Dados-do-scraping/main')
+FONTES = fontes_manifesto(URL_BASE)
+
+# Configurações do cache e do download (podem ser alteradas por variáveis de ambiente)
+DIRETORIO_CACHE = os.environ.get(
+    'BRAGANTINO_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+)
+TTL_SEGUNDOS = float(os.environ.get('BRAGANTINO_CACHE_TTL', 6 * 60 * 60))
+TIMEOUT_SEGUNDOS = float(os.environ.get('BRAGANTINO_HTTP_TIMEOUT', 10))
+TENTATIVAS = int(os.environ.get('BRAGANTINO_HTTP_TENTATIVAS', 3))
+ESPERA_INICIAL_SEGUNDOS = 0.5
+# Depois de um download que falhou (e serviu a cópia vencida do disco), a fonte só volta a ser
+# buscada na rede após ESPERA_APOS_FALHA_SEGUNDOS, sem repetir as tentativas a cada página
+ESPERA_APOS_FALHA_SEGUNDOS = float(os.environ.get('BRAGANTINO_ESPERA_APOS_FALHA', 5 * 60))
+MAX_DOWNLOADS_SIMULTANEOS = 6
+
+# Leitura dos CSVs em pedaços de LINHAS_POR_PEDACO linhas com os tipos do esquema dos dados
+# (esquema.py), sem inferência
+LINHAS_POR_PEDACO = int(os.environ.get('BRAGANTINO_CSV_PEDACO', 25_000))
+
+# Cache em memória compartilhado por todas as sessões do processo: {nome: (instante, DataFrame)}.
+# _trava protege só os dicionários; cada fonte tem a sua trava, mantida durante a leitura do
+# disco e o download, para que uma fonte lenta não bloqueie as demais e cada fonte seja
+# baixada uma vez mesmo com várias sessões pedindo ao mesmo tempo
+_cache_memoria = {}
+_travas_fonte = {}
+# Instante da última falha de download de cada fonte servida com a cópia vencida
+_falhas = {}
+# Divergências do esquema na última leitura de cada fonte baixada: {nome: divergências}
+_divergencias = {}
+_trava_divergencias = threading.Lock()
+_trava = threading.Lock()
+
+# A versão do esquema faz parte do nome: fontes lidas com outro esquema não são reaproveitadas
+def _caminho_disco(nome):
+    return os.path.join(DIRETORIO_CACHE, f'{nome}.esquema{VERSAO_ESQUEMA}.pkl')
+
+def _caminho_validadores(nome):
+    return os.path.join(DIRETORIO_CACHE, f'{nome}.http.json')
+
+# Escreve em um arquivo temporário e renomeia para não deixar cópias corrompidas
+def _escrever_atomico(caminho, escrever):
+    os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+def _salvar_disco(nome, df):
+    _escrever_atomico(_caminho_disco(nome), df.to_pickle)
+
+def _ler_disco(nome, ttl):
+    caminho = _caminho_disco(nome)
+    if not os.path.exists(caminho):
+        return None
+    instante = os.path.getmtime(caminho)
+    if ttl is not None and time.time() - instante > ttl:
+        return None
+    return instante, pd.read_pickle(caminho)
+
+# ETag e Last-Modified da última resposta completa, usados nas requisições condicionais
+def _ler_validadores(nome):
+    caminho = _caminho_validadores(nome)
+    if not os.path.exists(caminho) or not os.path.exists(_caminho_disco(nome)):
+        return {}
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+def _salvar_validadores(nome, cabecalhos):
+    validadores = {
+        chave: cabecalhos[chave] for chave in ('ETag', 'Last-Modified') if chave in cabecalhos
+    }
+
+    def escrever(caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(validadores, f)
+
+    _escrever_atomico(_caminho_validadores(nome), escrever)
+
+def _ler_pedacos(caminho, tipos):
+    return pd.read_csv(caminho, usecols=usar_coluna, dtype=tipos, na_values=ESQUEMA['valores_faltantes'],
+                       chunksize=LINHAS_POR_PEDACO)
+
+# Limite superior do número de linhas do arquivo (quebras de linha + 1)
+def _contar_linhas(caminho):
+    with open(caminho, 'rb') as f:
+        return sum(bloco.count(b'\n') for bloco in iter(lambda: f.read(1 << 20), b'')) + 1
+
+# Lê os pedaços direto em uma matriz float64 pré-alocada (uma linha por coluna numérica, para
+# que cada coluna fique contígua), sem juntar cópias dos pedaços no fim, e preenche os
+# faltantes conforme o esquema. Com coagir, as colunas numéricas são lidas como texto e
+# convertidas, e as colunas fora do esquema sem nenhum valor numérico são descartadas.
+# Devolve a tabela, os valores inválidos e os faltantes por coluna e as colunas descartadas.
+def _ler_tipado(caminho, colunas, coagir=False):
+    texto = colunas_texto(colunas)
+    numericas = [col for col in colunas if col not in texto]
+    matriz = np.empty((len(numericas), _contar_linhas(caminho)))
+    textos = {col: [] for col in texto}
+    tipos = defaultdict(lambda: object) if coagir else tipos_leitura()
+    linhas, invalidos, validos = 0, dict.fromkeys(numericas, 0), dict.fromkeys(numericas, 0)
+    for pedaco in _ler_pedacos(caminho, tipos):
+        if coagir:
+            for col in numericas:
+                pedaco[col], n = converter_numeros(pedaco[col])
+                invalidos[col] += n
+                validos[col] += int(pedaco[col].notna().sum())
+        fim = linhas + len(pedaco)
+        matriz[:, linhas:fim] = pedaco[numericas].to_numpy(dtype='float64').T
+        for col, partes in textos.items():
+            partes.append(pedaco[col].to_numpy())
+        linhas = fim
+
+    matriz = matriz[:, :linhas]
+    descartadas = colunas_nao_numericas(numericas, validos, invalidos) if coagir else []
+    if descartadas:
+        matriz = matriz[[col not in descartadas for col in numericas]]
+        numericas = [col for col in numericas if col not in descartadas]
+        colunas = [col for col in colunas if col not in descartadas]
+    faltantes = preencher_faltantes(matriz, numericas)
+    df_textos = pd.DataFrame({
+        col: np.concatenate(partes) if partes else np.array([], dtype=object) for col, partes in textos.items()
+    })
+    df = pd.concat([df_textos, pd.DataFrame(matriz.T, columns=numericas)], axis=1, copy=False)
+    # Os arquivos do scraping trazem a identificação antes das métricas; outra ordem custa uma cópia
+    df = df if df.columns.tolist() == colunas else df[colunas]
+    return df, {col: n for col, n in invalidos.items() if n and col in numericas}, faltantes, descartadas
+
+# Lê um CSV das fontes em pedaços, com os tipos do esquema. Se alguma coluna numérica tiver
+# um valor não numérico fora dos faltantes do esquema, o arquivo é relido com elas como
+# texto e convertido (valores inválidos viram faltantes). Devolve a tabela e as divergências
+# do esquema (colunas ausentes e descartadas, valores inválidos e faltantes), também
+# registradas na etapa.
+def ler_csv_esquema(caminho):
+    with etapa('ler_csv', versao_esquema=VERSAO_ESQUEMA) as registro:
+        colunas = pd.read_csv(caminho, nrows=0).columns.tolist()
+        divergencias = {'colunas_ausentes': colunas_ausentes(colunas)}
+        colunas = [col for col in colunas if usar_coluna(col)]
+        try:
+            df, invalidos, faltantes, descartadas = _ler_tipado(caminho, colunas)
+        except ValueError:
+            df, invalidos, faltantes, descartadas = _ler_tipado(caminho, colunas, coagir=True)
+        divergencias.update(colunas_descartadas=descartadas, valores_invalidos=invalidos, valores_faltantes=faltantes)
+        divergencias = {chave: valor for chave, valor in divergencias.items() if valor}
+        if divergencias:
+            registro['divergencias_esquema'] = divergencias
+        registro.update(formato(df))
+    return df, divergencias
+
+def ler_csv(caminho):
+    return ler_csv_esquema(caminho)[0]
+
+# Grava o corpo da resposta em um arquivo temporário, aos poucos, e lê o CSV dele: o
+# conteúdo inteiro nunca fica em memória junto com a tabela
+def _ler_resposta(nome, resposta):
+    os.makedirs(DIRETORIO_CACHE, exist_ok=True)
+    temporario = f'{_caminho_disco(nome)}.{os.getpid()}.{threading.get_ident()}.csv.tmp'
+    try:
+        with resposta, open(temporario, 'wb') as f:
+            for bloco in resposta.iter_content(1 << 20):
+                f.write(bloco)
+        return ler_csv_esquema(temporario)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+# GET condicional com timeout e novas tentativas (erros de conexão e respostas 5xx); o corpo
+# é lido sob demanda (stream), por quem recebe a resposta
+def _requisitar(url, validadores, tentativas=None, timeout=None):
+    tentativas = TENTATIVAS if tentativas is None else tentativas
+    if tentativas < 1:
+        raise ValueError(f'O número de tentativas deve ser pelo menos 1 (recebido: {tentativas})')
+    timeout = TIMEOUT_SEGUNDOS if timeout is None else timeout
+    cabecalhos = {}
+    if 'ETag' in validadores:
+        cabecalhos['If-None-Match'] = validadores['ETag']
+    if 'Last-Modified' in validadores:
+        cabecalhos['If-Modified-Since'] = validadores['Last-Modified']
+
+    for tentativa in range(tentativas):
+        try:
+            resposta = requests.get(url, headers=cabecalhos, timeout=timeout, stream=True)
+            if resposta.status_code < 500:
+                # Erros 4xx não melhoram com novas tentativas
+                if resposta.status_code >= 400:
+                    resposta.close()
+                resposta.raise_for_status()
+                return resposta
+            resposta.close()
+            erro = requests.HTTPError(f'{resposta.status_code} ao baixar {url}', response=resposta)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            erro = e
+        if tentativa < tentativas - 1:
+            time.sleep(ESPERA_INICIAL_SEGUNDOS * 2 ** tentativa)
+    raise erro
+
+# Revalida uma fonte na rede; 304 reaproveita a cópia em disco e renova sua validade
+def _atualizar_fonte(nome, agora):
+    with etapa('download', fonte=nome) as registro:
+        validadores = _ler_validadores(nome)
+        try:
+            resposta = _requisitar(FONTES[nome], validadores)
+        except Exception:
+            # Fonte indisponível: recorre à última cópia em disco, mesmo vencida
+            entrada = _ler_disco(nome, ttl=None)
+            if entrada is None:
+                raise
+            registro['cache'] = 'disco vencido'
+            with _trava:
+                _falhas[nome] = agora
+            return entrada
+
+        if resposta.status_code == 304:
+            resposta.close()
+            entrada = _ler_disco(nome, ttl=None)
+            if entrada is not None:
+                os.utime(_caminho_disco(nome))
+                with _trava:
+                    _falhas.pop(nome, None)
+                registro['cache'] = 'revalidado'
+                return agora, entrada[1]
+            # Cópia em disco sumiu entre a leitura dos validadores e a resposta: baixa de novo
+            resposta = _requisitar(FONTES[nome], {})
+
+        df, divergencias = _ler_resposta(nome, resposta)
+        registro.update(cache='miss', **formato(df))
+    with _trava:
+        _falhas.pop(nome, None)
+    with _trava_divergencias:
+        _divergencias[nome] = divergencias
+    _salvar_disco(nome, df)
+    _salvar_validadores(nome, resposta.headers)
+    return agora, df
+
+def _trava_fonte(nome):
+    with _trava:
+        return _travas_fonte.setdefault(nome, threading.Lock())
+
+# Entrada da fonte na memória ou no disco dentro do TTL, ou a cópia vencida em memória logo
+# após uma falha de download (ou None)
+def _entrada_valida(nome, ttl, agora):
+    with _trava:
+        entrada = _cache_memoria.get(nome)
+        falha = _falhas.get(nome)
+    if entrada is not None and falha is not None and agora - falha <= ESPERA_APOS_FALHA_SEGUNDOS:
+        return entrada
+    if entrada is None or agora - entrada[0] > ttl:
+        entrada = _ler_disco(nome, ttl)
+    return entrada
+
+# Entrada de uma fonte, baixando-a se preciso. Quem espera pela trava da fonte enquanto outra
+# sessão a baixa encontra a entrada nova ao entrar e não repete o download.
+def _obter_fonte(nome, ttl, agora):
+    with _trava_fonte(nome):
+        entrada = _entrada_valida(nome, ttl, agora)
+        if entrada is None:
+            entrada = _atualizar_fonte(nome, agora)
+        with _trava:
+            _cache_memoria[nome] = entrada
+    return entrada
+
+# Carrega as fontes de dados e devolve cópias independentes para a página.
+# Ordem de busca: memória -> disco dentro do TTL -> rede (em paralelo, com requisições condicionais).
+def carregar_fontes(nomes=None, ttl=None):
+    ttl = TTL_SEGUNDOS if ttl is None else ttl
+    nomes = list(FONTES) if nomes is None else nomes
+    with etapa('carregar_fontes') as registro:
+        agora = time.time()
+        entradas = {}
+        for nome in nomes:
+            entrada = _entrada_valida(nome, ttl, agora)
+            if entrada is not None:
+                with _trava:
+                    _cache_memoria[nome] = entrada
+                entradas[nome] = entrada
+        pendentes = [nome for nome in nomes if nome not in entradas]
+
+        registro.update(cache='miss' if pendentes else 'hit', fontes=len(nomes), fontes_baixadas=len(pendentes))
+        if pendentes:
+            # Os downloads herdam a execução atual para aparecerem no perfil da página
+            obter = com_contexto(lambda nome: _obter_fonte(nome, ttl, agora))
+            with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOADS_SIMULTANEOS, len(pendentes))) as executor:
+                entradas.update(zip(pendentes, executor.map(obter, pendentes)))
+
+    # As páginas alteram os DataFrames (IDs, filtros), então o cache não é exposto diretamente
+    return {nome: entradas[nome][1].copy() for nome in nomes}
+
+# Divergências do esquema encontradas nas fontes baixadas por este processo: {nome: divergências};
+# fontes sem divergências ficam com um dicionário vazio
+def divergencias_esquema():
+    with _trava_divergencias:
+        return dict(_divergencias)
+
+# Invalida o cache em memória e em disco (de uma fonte ou de todas) e os snapshots das
+# posições que usam essas fontes, para que a próxima leitura reconstrua tudo
+def invalidar_cache(nomes=None):
+    # Importados aqui: os snapshots dependem deste módulo
+    from preprocessamento import POSICOES, fontes_posicao
+    from snapshots import invalidar_snapshots
+
+    nomes = list(FONTES) if nomes is None else nomes
+    for nome in nomes:
+        with _trava_fonte(nome):
+            with _trava:
+                _cache_memoria.pop(nome, None)
+                _falhas.pop(nome, None)
+            for caminho in (_caminho_disco(nome), _caminho_validadores(nome)):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+    invalidar_snapshots([posicao for posicao in POSICOES if set(fontes_posicao(posicao)) & set(nomes)])
+
+if __name__ == '__main__':
+    invalidar_cache()
+    print('Cache de dados e snapshots invalidados.')
@@ -0,0 +1,119 @@
+import argparse
+import sys
+
+from agrupamento import ler_predefinicoes
+from consultas import (
+    classificar_jogadores, jogadores_similares, jogadores_similares_multiplos, matriz_similaridade
+)
+from exportacao import FORMATOS_EXPORTACAO, blocos_tabela, escrever_blocos
+from preprocessamento import POSICOES
+
+# Linha de comando para as consultas, sem o Streamlit. Exemplos:
+#   python Projeto-site/cli.py similares --posicao Atacante --jogador "Nome" -n 20 --formato json
+#   python Projeto-site/cli.py multiplos --posicao Defensor --jogadores "A" "B" --saida similares.csv
+#   python Projeto-site/cli.py classificacao --posicao Goleiro --colunas "Col 1" "Col 2" --peso "Col 1" 3
+#   python Projeto-site/cli.py classificacao --posicao Atacante --colunas "Col 1" "Col 2" --percentis
+#   python Projeto-site/cli.py similares ... --agrupamento "Criação" "Col 1" "Col 2" --agrupamento "Defesa" "Col 3" "Col 4"
+#   python Projeto-site/cli.py similares ... --predefinicao "Meia criativo"
+#   python Projeto-site/cli.py classificacao ... --todos --formato parquet --saida classificacao.parquet
+#   python Projeto-site/cli.py matriz --posicao Defensor --colunas "Col 1" "Col 2" --saida matriz.parquet
+
+def _adicionar_argumentos_consulta(parser):
+    parser.add_argument('--posicao', required=True, choices=POSICOES)
+    parser.add_argument('--colunas', nargs='+', help='Colunas de interesse (padrão: colunas de destaque)')
+    parser.add_argument('--peso', nargs=2, action='append', metavar=('COLUNA', 'PESO'),
+                        help='Peso de uma coluna ou agrupamento (os demais ficam com o padrão); pode ser repetido')
+    parser.add_argument('--agrupamento', nargs='+', action='append', metavar='NOME_E_COLUNAS',
+                        help='Nome do agrupamento seguido das suas colunas; pode ser repetido')
+    parser.add_argument('--predefinicao', help='Predefinição de agrupamentos salva para a posição (pelo site)')
+
+def _adicionar_argumentos_comuns(parser):
+    _adicionar_argumentos_consulta(parser)
+    parser.add_argument('-n', type=int, default=30, help='Quantidade de linhas no resultado (padrão: 30)')
+    parser.add_argument('--todos', action='store_true', help='Resultado completo, com todos os jogadores (ignora -n)')
+    parser.add_argument('--formato', choices=['csv', 'json', 'parquet'], default='csv')
+    parser.add_argument('--saida', help='Arquivo de saída (padrão: saída padrão)')
+
+def _pesos(args):
+    if not args.peso:
+        return None
+    return {coluna: float(peso) for coluna, peso in args.peso}
+
+# Agrupamentos da predefinição (se houver) mais os informados com --agrupamento
+def _agrupamentos(args, parser):
+    agrupamentos = {}
+    if args.predefinicao:
+        predefinicoes = ler_predefinicoes(args.posicao)
+        if args.predefinicao not in predefinicoes:
+            parser.error(f"predefinição '{args.predefinicao}' não encontrada para {args.posicao}")
+        agrupamentos.update(predefinicoes[args.predefinicao])
+    agrupamentos.update({grupo[0]: grupo[1:] for grupo in args.agrupamento or []})
+    return agrupamentos or None
+
+# Resultado na saída padrão ou, em CSV/Parquet com --saida, gravado em blocos
+def _escrever(df, args):
+    if args.saida and args.formato in FORMATOS_EXPORTACAO:
+        escrever_blocos(blocos_tabela(df), args.saida, args.formato)
+        return
+    destino = args.saida or sys.stdout
+    if args.formato == 'json':
+        df.to_json(destino, orient='records', force_ascii=False, indent=2)
+        if destino is sys.stdout:
+            sys.stdout.write('\n')
+    else:
+        df.to_csv(destino, index=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Consultas de similaridade e classificação de jogadores.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    parser_similares = subparsers.add_parser('similares', help='Jogadores similares a um jogador')
+    parser_similares.add_argument('--jogador', required=True, help='Nome ou ID (liga:time:nome) do jogador')
+    parser_similares.add_argument('--percentis', action='store_true',
+                                  help='Colunas de destaque pelos maiores percentis do jogador na posição')
+    _adicionar_argumentos_comuns(parser_similares)
+
+    parser_multiplos = subparsers.add_parser('multiplos', help='Jogadores similares a um conjunto de jogadores')
+    parser_multiplos.add_argument('--jogadores', nargs='+', required=True, help='Nomes ou IDs (liga:time:nome) dos jogadores')
+    _adicionar_argumentos_comuns(parser_multiplos)
+
+    parser_classificacao = subparsers.add_parser('classificacao', help="Classificação pelo 'Jogador Máximo'")
+    parser_classificacao.add_argument('--percentis', action='store_true',
+                                      help='Classifica pelo percentil médio ponderado na posição')
+    _adicionar_argumentos_comuns(parser_classificacao)
+
+    parser_matriz = subparsers.add_parser('matriz', help='Matriz de similaridade de todos os jogadores da posição')
+    _adicionar_argumentos_consulta(parser_matriz)
+    parser_matriz.add_argument('--largo', action='store_true',
+                               help='Uma linha por jogador e uma coluna por ID, só com a Similaridade Total')
+    parser_matriz.add_argument('--formato', choices=FORMATOS_EXPORTACAO, help='Padrão: pela extensão da saída')
+    parser_matriz.add_argument('--saida', required=True, help='Arquivo de saída (.csv ou .parquet)')
+
+    args = parser.parse_args(argv)
+    if args.formato == 'parquet' and not args.saida:
+        parser.error('o formato parquet exige --saida')
+    agrupamentos = _agrupamentos(args, parser)
+    try:
+        pesos = _pesos(args)
+        if args.comando == 'matriz':
+            blocos = matriz_similaridade(args.posicao, args.colunas, pesos, agrupamentos, args.largo)
+            linhas = escrever_blocos(blocos, args.saida, args.formato)
+            print(f'{linhas} linhas gravadas em {args.saida}', file=sys.stderr)
+            return
+
+        n = None if args.todos else args.n
+        if args.comando == 'similares':
+            df = jogadores_similares(args.posicao, args.jogador, args.colunas, pesos, agrupamentos, n, args.percentis)
+        elif args.comando == 'multiplos':
+            df = jogadores_similares_multiplos(args.posicao, args.jogadores, args.colunas, pesos, agrupamentos, n)
+        else:
+            if not args.colunas and not agrupamentos:
+                parser.error('a classificação exige --colunas ou --agrupamento')
+            df = classificar_jogadores(args.posicao, args.colunas or [], pesos, agrupamentos, n, args.percentis)
+    # Jogador não encontrado ou ambíguo, coluna inexistente, peso inválido: mensagem de uso, sem traceback
+    except (KeyError, ValueError) as e:
+        parser.error(e.args[0] if e.args else str(e))
+    _escrever(df, args)
+
+if __name__ == '__main__':
+    main()
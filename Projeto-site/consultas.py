@@ -0,0 +1,136 @@
+import pandas as pd
+
+from agrupamento import aplicar_pca
+from exportacao import blocos_matriz_similaridade
+from indice_vizinhos import COLUNAS_REMOVIDAS
+from perfil_execucao import etapa, formato
+from motor_similaridade import (
+    JogadorNaoEncontrado, calcular_similaridades, colunas_destaque, colunas_destaque_multiplos, get_default_weight
+)
+from percentis import carregar_percentis, classificar_por_percentil, colunas_destaque_percentil
+from preprocessamento import COLUNA_ID
+from snapshots import carregar_posicao
+
+# API sem Streamlit para as três ferramentas do site. Cada função recebe a posição e os
+# parâmetros que as páginas coletam nos widgets e devolve o DataFrame de resultado numérico
+# (com n, apenas as n primeiras linhas; sem n, o resultado completo).
+# Os pesos informados substituem os pesos padrão apenas das colunas (ou agrupamentos) citadas.
+# df_final permite passar a tabela da posição já carregada (ex.: mantida em memória pelo
+# serviço); sem ela a tabela é aberta do snapshot a cada chamada.
+
+# Colunas removidas pela página de similaridade de múltiplos jogadores
+COLUNAS_REMOVIDAS_MULTIPLOS = [
+    'País do jogador', 'Posição do jogador', 'Time do jogador', 'Idade',
+    'Ano de nascimento', 'Jogos disputados', 'Jogos iniciados pelo jogador',
+    'Minutos jogados', 'Minutos jogados divididos por 90'
+]
+
+# Nome da linha sintética usada como referência na classificação
+JOGADOR_MAXIMO = 'Jogador Máximo'
+
+# DataFrame da posição sem as colunas que a ferramenta não usa como métrica
+def carregar_df_final(posicao, colunas_removidas=COLUNAS_REMOVIDAS):
+    return carregar_posicao(posicao, excluir=colunas_removidas)
+
+# ID de um jogador a partir do próprio ID ou do nome; nomes de homônimos são ambíguos
+def resolver_jogador(df_final, jogador):
+    ids = df_final[COLUNA_ID]
+    if (ids == jogador).any():
+        return jogador
+    encontrados = ids[df_final['Nome do jogador'] == jogador].tolist()
+    if not encontrados:
+        raise JogadorNaoEncontrado(f'Jogador não encontrado: {jogador}')
+    if len(encontrados) > 1:
+        raise ValueError(f"Nome ambíguo '{jogador}', use um dos IDs: {', '.join(encontrados)}")
+    return encontrados[0]
+
+# Rótulo de cada ID nos seletores das páginas: o nome, com o ID só para homônimos
+def rotulos_jogadores(df_final):
+    nomes = df_final['Nome do jogador'].astype(str)
+    homonimos = nomes.duplicated(keep=False)
+    rotulos = nomes.where(~homonimos, nomes + ' (' + df_final[COLUNA_ID] + ')')
+    return dict(zip(df_final[COLUNA_ID], rotulos))
+
+# Tabela usada no cálculo: colunas escolhidas ou, se houver agrupamentos, seus componentes PCA
+def preparar_df_normalized(df_final, colunas, agrupamentos=None):
+    if agrupamentos and any(agrupamentos.values()):
+        colunas_agrupadas = list(dict.fromkeys(col for columns in agrupamentos.values() for col in columns))
+        df_final_filtered = df_final[[COLUNA_ID, 'Nome do jogador'] + colunas_agrupadas]
+        with etapa('aplicar_pca', agrupamentos=sum(1 for columns in agrupamentos.values() if columns),
+                   **formato(df_final_filtered)):
+            return aplicar_pca(df_final_filtered, agrupamentos)
+    return df_final[[COLUNA_ID, 'Nome do jogador'] + list(colunas)]
+
+# Pesos padrão: 1 por agrupamento não vazio ou, sem agrupamentos, 5/3/1 pelas colunas de
+# destaque (ou 1 para todas, se top_columns for None), com os pesos informados por cima
+def pesos_padrao(colunas, top_columns, agrupamentos=None, pesos=None):
+    if agrupamentos and any(agrupamentos.values()):
+        padrao = {key: 1 for key, columns in agrupamentos.items() if columns}
+    elif top_columns is None:
+        padrao = {col: 1 for col in colunas}
+    else:
+        padrao = {col: int(get_default_weight(col, top_columns)) for col in colunas}
+    padrao.update({key: peso for key, peso in (pesos or {}).items() if key in padrao})
+    return padrao
+
+# Adiciona a linha 'Jogador Máximo' com o maior valor de cada coluna numérica
+def adicionar_jogador_maximo(df_normalized):
+    numeric_columns = df_normalized.select_dtypes(include='number').columns
+    jogador_maximo_values = {col: df_normalized[col].max() for col in numeric_columns}
+    jogador_maximo_values[COLUNA_ID] = JOGADOR_MAXIMO
+    jogador_maximo_values['Nome do jogador'] = JOGADOR_MAXIMO
+    resultado = pd.concat([df_normalized, pd.DataFrame([jogador_maximo_values])], ignore_index=True)
+    # A linha nova é derivada dos próprios valores: a versão da tabela continua valendo
+    resultado.attrs = dict(df_normalized.attrs)
+    return resultado
+
+# Colunas de destaque de um jogador (ID): maiores valores normalizados ou, com por_percentil,
+# maiores percentis na posição
+def destaque_jogador(posicao, df_final, jogador, por_percentil=False):
+    if por_percentil:
+        colunas = df_final.select_dtypes(include='number').columns
+        return colunas_destaque_percentil(carregar_percentis(posicao), jogador, colunas)
+    return colunas_destaque(df_final, jogador)
+
+# Jogadores similares a um jogador, dado pelo ID ou nome (página Similaridade de Jogadores)
+def jogadores_similares(posicao, jogador, colunas=None, pesos=None, agrupamentos=None, n=None,
+                        destaque_por_percentil=False, df_final=None):
+    df_final = carregar_df_final(posicao) if df_final is None else df_final
+    jogador = resolver_jogador(df_final, jogador)
+    top_columns = destaque_jogador(posicao, df_final, jogador, destaque_por_percentil)
+    colunas = top_columns if colunas is None else colunas
+    pesos = pesos_padrao(colunas, top_columns, agrupamentos, pesos)
+    df_normalized = preparar_df_normalized(df_final, colunas, agrupamentos)
+    return calcular_similaridades(df_normalized, jogador, pesos, n=n)
+
+# Jogadores similares à média de um conjunto de jogadores (página Similaridade de Múltiplos Jogadores)
+def jogadores_similares_multiplos(posicao, jogadores, colunas=None, pesos=None, agrupamentos=None, n=None,
+                                  df_final=None):
+    df_final = carregar_df_final(posicao, COLUNAS_REMOVIDAS_MULTIPLOS) if df_final is None else df_final
+    jogadores = [resolver_jogador(df_final, jogador) for jogador in jogadores]
+    top_columns = colunas_destaque_multiplos(df_final, jogadores)
+    colunas = top_columns if colunas is None else colunas
+    pesos = pesos_padrao(colunas, top_columns, agrupamentos, pesos)
+    df_normalized = preparar_df_normalized(df_final, colunas, agrupamentos)
+    return calcular_similaridades(df_normalized, jogadores, pesos, n=n)
+
+# Classificação pela proximidade ao 'Jogador Máximo' ou, com por_percentil, pelo percentil
+# médio ponderado na posição (página Classificação de Jogadores)
+def classificar_jogadores(posicao, colunas, pesos=None, agrupamentos=None, n=None, por_percentil=False,
+                          df_final=None):
+    pesos = pesos_padrao(colunas, None, agrupamentos, pesos)
+    if por_percentil:
+        return classificar_por_percentil(carregar_percentis(posicao), pesos, agrupamentos, n=n)
+    df_final = carregar_df_final(posicao) if df_final is None else df_final
+    df_normalized = adicionar_jogador_maximo(preparar_df_normalized(df_final, colunas, agrupamentos))
+    return calcular_similaridades(df_normalized, JOGADOR_MAXIMO, pesos, coluna_total='Classificação', n=n)
+
+# Matriz de similaridade de toda a posição em blocos de jogadores consultados (ver
+# exportacao.blocos_matriz_similaridade), com as mesmas colunas para todos os jogadores
+# (padrão: todas as métricas numéricas, com peso 1)
+def matriz_similaridade(posicao, colunas=None, pesos=None, agrupamentos=None, largo=False):
+    df_final = carregar_df_final(posicao)
+    colunas = df_final.select_dtypes(include='number').columns.tolist() if colunas is None else colunas
+    pesos = pesos_padrao(colunas, None, agrupamentos, pesos)
+    df_normalized = preparar_df_normalized(df_final, colunas, agrupamentos)
+    return blocos_matriz_similaridade(df_normalized, pesos, largo=largo)
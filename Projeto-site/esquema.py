@@ -0,0 +1,138 @@
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Esquema declarativo das fontes (esquema_dados.json): tipo ('texto' ou 'numero'), unidade e
+# papel ('identificador', 'metadado' ou 'metrica') de cada coluna conhecida; as colunas não
+# listadas seguem 'demais_colunas' (no scraping, as métricas), exceto as que não têm nenhum
+# valor numérico, que são descartadas e relatadas em 'colunas_descartadas'. O esquema é aplicado na leitura,
+# igual para todas as ligas e para os goleiros: textos como texto, o resto como float64, com
+# os 'valores_faltantes' preenchidos por 'preencher_faltantes' (null mantém NaN). Colunas
+# 'obrigatorias' ausentes são um erro; as demais divergências (colunas ausentes, valores
+# inválidos e faltantes) são devolvidas para serem relatadas, não corrigidas em silêncio.
+# Mudanças no esquema devem incrementar 'versao', que invalida as fontes já lidas em cache.
+# BRAGANTINO_ESQUEMA aponta para outro arquivo.
+CAMINHO_ESQUEMA = os.environ.get(
+    'BRAGANTINO_ESQUEMA',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'esquema_dados.json')
+)
+
+TIPOS = {'texto': object, 'numero': 'float64'}
+PAPEIS = ['identificador', 'metadado', 'metrica']
+
+# Lê e valida um esquema de dados
+def ler_esquema(caminho=CAMINHO_ESQUEMA):
+    with open(caminho, encoding='utf-8') as f:
+        esquema = json.load(f)
+    if not isinstance(esquema.get('versao'), int):
+        raise ValueError(f"Esquema sem 'versao' inteira em {caminho}")
+    definicoes = {**esquema.get('colunas', {}), '(demais colunas)': esquema.get('demais_colunas', {})}
+    for coluna, definicao in definicoes.items():
+        if definicao.get('tipo') not in TIPOS or definicao.get('papel') not in PAPEIS:
+            raise ValueError(f"Tipo ou papel inválido para a coluna '{coluna}' em {caminho}: {definicao}")
+    obrigatorias = esquema.setdefault('obrigatorias', [])
+    fora = [col for col in obrigatorias if col not in esquema['colunas']]
+    if fora:
+        raise ValueError(f'Colunas obrigatórias não definidas em {caminho}: {fora}')
+    esquema.setdefault('valores_faltantes', [])
+    esquema.setdefault('preencher_faltantes', None)
+    esquema.setdefault('ignoradas', [])
+    return esquema
+
+ESQUEMA = ler_esquema()
+VERSAO_ESQUEMA = ESQUEMA['versao']
+
+# Colunas que nenhuma etapa usa e nem são lidas: índices exportados pelo pandas ('Unnamed: ...'),
+# as 'ignoradas' do esquema e as listadas em BRAGANTINO_COLUNAS_IGNORADAS (separadas por vírgula)
+COLUNAS_IGNORADAS = ESQUEMA['ignoradas'] + [
+    col for col in os.environ.get('BRAGANTINO_COLUNAS_IGNORADAS', '').split(',') if col
+]
+
+def usar_coluna(coluna):
+    return not coluna.startswith('Unnamed:') and coluna not in COLUNAS_IGNORADAS
+
+# Definição de uma coluna ({'tipo', 'papel' e, se houver, 'unidade'})
+def definicao_coluna(coluna, esquema=ESQUEMA):
+    return esquema['colunas'].get(coluna, esquema['demais_colunas'])
+
+# Colunas de um papel ('identificador', 'metadado' ou 'metrica'), na ordem recebida
+def colunas_do_papel(colunas, papel, esquema=ESQUEMA):
+    return [col for col in colunas if definicao_coluna(col, esquema)['papel'] == papel]
+
+def colunas_texto(colunas, esquema=ESQUEMA):
+    return [col for col in colunas if definicao_coluna(col, esquema)['tipo'] == 'texto']
+
+# Tipos para o read_csv: todas as colunas com o tipo do esquema, sem inferência
+def tipos_leitura(esquema=ESQUEMA):
+    return defaultdict(
+        lambda: TIPOS[esquema['demais_colunas']['tipo']],
+        {col: TIPOS[definicao['tipo']] for col, definicao in esquema['colunas'].items()}
+    )
+
+# Colunas do esquema ausentes de uma tabela; a falta de uma obrigatória é um erro
+def colunas_ausentes(colunas, esquema=ESQUEMA):
+    presentes = set(colunas)
+    obrigatorias = [col for col in esquema['obrigatorias'] if col not in presentes]
+    if obrigatorias:
+        raise ValueError(f"Colunas obrigatórias ausentes (esquema versão {esquema['versao']}): {obrigatorias}")
+    return [col for col in esquema['colunas'] if col not in presentes and usar_coluna(col)]
+
+# Converte uma coluna de texto em números; devolve os números e quantos valores fora dos
+# 'valores_faltantes' não eram numéricos (viram NaN)
+def converter_numeros(serie, esquema=ESQUEMA):
+    serie = serie.mask(serie.isin(esquema['valores_faltantes']))
+    numeros = pd.to_numeric(serie, errors='coerce')
+    return numeros, int(numeros.isna().sum() - serie.isna().sum())
+
+# Colunas fora do esquema em que nenhum valor é numérico (ex.: um texto novo no scraping): não
+# são métricas e são descartadas, em vez de virarem uma coluna só de faltantes
+def colunas_nao_numericas(colunas, validos, invalidos, esquema=ESQUEMA):
+    return [col for col in colunas if col not in esquema['colunas'] and invalidos.get(col) and not validos.get(col)]
+
+# Preenche, no lugar, os valores faltantes de uma matriz com uma linha por coluna numérica;
+# devolve {coluna: valores faltantes} das colunas que tinham algum
+def preencher_faltantes(matriz, colunas, esquema=ESQUEMA):
+    faltantes = np.isnan(matriz)
+    contagens = faltantes.sum(axis=1)
+    if esquema['preencher_faltantes'] is not None and contagens.any():
+        np.copyto(matriz, esquema['preencher_faltantes'], where=faltantes)
+    return {col: int(n) for col, n in zip(colunas, contagens) if n}
+
+# Aplica o esquema a uma tabela já em memória (ex.: dados sintéticos; os CSVs das fontes já
+# são lidos com ele): as colunas numéricas são convertidas de uma vez para uma matriz float64,
+# e só as colunas com valores não numéricos passam por conversão individual. Devolve a
+# tabela e as divergências encontradas.
+def aplicar_esquema(df, esquema=ESQUEMA):
+    divergencias = {'colunas_ausentes': colunas_ausentes(df.columns, esquema)}
+    colunas = [col for col in df.columns if usar_coluna(col)]
+    texto = colunas_texto(colunas, esquema)
+    numericas = [col for col in colunas if col not in texto]
+
+    bloco = df[numericas]
+    objetos = [col for col in numericas if not pd.api.types.is_numeric_dtype(bloco[col])]
+    if objetos:
+        faltantes = esquema['valores_faltantes']
+        bloco = bloco.assign(**{col: bloco[col].mask(bloco[col].isin(faltantes)) for col in objetos})
+    invalidos, validos = {}, {}
+    try:
+        matriz = np.array(bloco.to_numpy(dtype='float64').T, order='C')
+    except (TypeError, ValueError):
+        matriz = np.empty((len(numericas), len(df)))
+        for i, col in enumerate(numericas):
+            numeros, invalidos[col] = converter_numeros(bloco[col], esquema) if col in objetos else (bloco[col], 0)
+            matriz[i] = numeros.to_numpy(dtype='float64')
+            validos[col] = int(numeros.notna().sum())
+        divergencias['colunas_descartadas'] = colunas_nao_numericas(numericas, validos, invalidos, esquema)
+        if divergencias['colunas_descartadas']:
+            manter = [col not in divergencias['colunas_descartadas'] for col in numericas]
+            matriz, numericas = matriz[manter], [col for col in numericas if col not in divergencias['colunas_descartadas']]
+            colunas = [col for col in colunas if col not in divergencias['colunas_descartadas']]
+            invalidos = {col: invalidos[col] for col in numericas if col in invalidos}
+    divergencias['valores_invalidos'] = {col: n for col, n in invalidos.items() if n}
+    divergencias['valores_faltantes'] = preencher_faltantes(matriz, numericas, esquema)
+
+    df = pd.concat([df[texto], pd.DataFrame(matriz.T, columns=numericas, index=df.index)], axis=1, copy=False)
+    return df[colunas], {chave: valor for chave, valor in divergencias.items() if valor}
@@ -0,0 +1,165 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from carregamento_dados import DIRETORIO_CACHE
+from motor_similaridade import calcular_similaridades
+from perfil_execucao import com_contexto, etapa
+from preprocessamento import COLUNA_ID
+
+# Exportação dos resultados completos (todas as linhas, com as similaridades numéricas) e da
+# matriz de similaridade de uma posição inteira. Os resultados são escritos em blocos de até
+# LINHAS_POR_BLOCO linhas, em CSV ou Parquet (que exige o pyarrow), então a matriz N x N
+# nunca fica inteira em memória. As páginas disparam as exportações em segundo plano.
+FORMATOS_EXPORTACAO = ['csv', 'parquet']
+LINHAS_POR_BLOCO = int(os.environ.get('BRAGANTINO_EXPORTACAO_BLOCO', 100_000))
+DIRETORIO_EXPORTACOES = os.environ.get('BRAGANTINO_EXPORTACOES_DIR', os.path.join(DIRETORIO_CACHE, 'exportacoes'))
+EXPORTACOES_SIMULTANEAS = 2
+
+# Exportações iniciadas pelas páginas (as mais recentes): {ID da exportação: estado}
+_MAX_EXPORTACOES = 50
+_exportacoes = OrderedDict()
+_trava = threading.Lock()
+_executor = None
+
+# Formato pelo parâmetro ou pela extensão do arquivo (padrão: CSV)
+def formato_exportacao(caminho, formato=None):
+    if formato is None:
+        formato = 'parquet' if str(caminho).endswith('.parquet') else 'csv'
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato} (use {', '.join(FORMATOS_EXPORTACAO)})")
+    return formato
+
+# Blocos de linhas de uma tabela já calculada (ex.: uma classificação completa)
+def blocos_tabela(df, linhas_por_bloco=LINHAS_POR_BLOCO):
+    for inicio in range(0, max(len(df), 1), linhas_por_bloco):
+        yield df.iloc[inicio:inicio + linhas_por_bloco]
+
+# Matriz de similaridade da posição, em blocos de jogadores consultados (padrão: todos).
+# No formato longo cada bloco tem uma linha por par (ID consultado, jogador), com as seis
+# similaridades e a Similaridade Total, em ordem decrescente para cada jogador consultado.
+# No formato largo (largo=True) cada linha é um jogador consultado e cada coluna o ID de um
+# jogador, com a Similaridade Total (1 na diagonal).
+def blocos_matriz_similaridade(df_normalized, pesos, jogadores=None, largo=False, linhas_por_bloco=LINHAS_POR_BLOCO):
+    ids = pd.Index(df_normalized[COLUNA_ID])
+    jogadores = ids.tolist() if jogadores is None else list(jogadores)
+    jogadores_por_bloco = max(1, linhas_por_bloco // max(len(ids), 1))
+
+    for inicio in range(0, max(len(jogadores), 1), jogadores_por_bloco):
+        consultados = jogadores[inicio:inicio + jogadores_por_bloco]
+        partes = []
+        with etapa('exportar_bloco_matriz', jogadores=len(consultados), linhas=len(ids)):
+            for jogador in consultados:
+                resultado = calcular_similaridades(df_normalized, jogador, pesos, cache=False)
+                if largo:
+                    linha = np.full(len(ids), np.nan)
+                    linha[ids.get_indexer(resultado[COLUNA_ID])] = resultado['Similaridade Total'].values
+                    linha[ids.get_loc(jogador)] = 1.0
+                    partes.append(linha)
+                else:
+                    resultado.insert(0, 'ID consultado', jogador)
+                    partes.append(resultado)
+        if largo:
+            bloco = pd.DataFrame(np.vstack(partes) if partes else np.empty((0, len(ids))), columns=ids.tolist())
+            bloco.insert(0, 'ID consultado', consultados)
+        else:
+            bloco = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=['ID consultado'])
+        yield bloco
+
+# Escreve os blocos em um arquivo CSV ou Parquet (um row group por bloco), via arquivo
+# temporário renomeado no fim. progresso(linhas) é chamado após cada bloco. Devolve o
+# total de linhas escritas.
+def escrever_blocos(blocos, caminho, formato=None, progresso=None):
+    formato = formato_exportacao(caminho, formato)
+    if formato == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError('A exportação em Parquet requer o pacote pyarrow') from e
+
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    linhas = 0
+    try:
+        if formato == 'parquet':
+            escritor = None
+            try:
+                for bloco in blocos:
+                    tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(temporario, tabela.schema)
+                    escritor.write_table(tabela.cast(escritor.schema))
+                    linhas += len(bloco)
+                    if progresso:
+                        progresso(linhas)
+            finally:
+                if escritor is not None:
+                    escritor.close()
+        else:
+            with open(temporario, 'w', encoding='utf-8', newline='') as f:
+                for i, bloco in enumerate(blocos):
+                    bloco.to_csv(f, index=False, header=i == 0)
+                    linhas += len(bloco)
+                    if progresso:
+                        progresso(linhas)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return linhas
+
+def _obter_executor():
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXPORTACOES_SIMULTANEAS, thread_name_prefix='exportacao')
+        return _executor
+
+# Inicia uma exportação em segundo plano e devolve seu ID. gerar_blocos() é chamada na
+# thread da exportação (o cálculo também sai da execução da página) e devolve os blocos.
+# O arquivo fica em DIRETORIO_EXPORTACOES, com o nome informado e o ID da exportação.
+def iniciar_exportacao(gerar_blocos, nome, formato='csv'):
+    formato = formato_exportacao(nome, formato)
+    id_exportacao = uuid.uuid4().hex[:12]
+    estado = {
+        'id': id_exportacao,
+        'nome': nome,
+        'caminho': os.path.join(DIRETORIO_EXPORTACOES, f'{nome}_{id_exportacao}.{formato}'),
+        'formato': formato,
+        'situacao': 'na fila',
+        'linhas': 0,
+        'erro': None,
+    }
+
+    def executar():
+        estado['situacao'] = 'em andamento'
+        try:
+            with etapa('exportar', arquivo=nome, formato=formato) as registro:
+                registro['linhas'] = escrever_blocos(gerar_blocos(), estado['caminho'], formato,
+                                                     lambda linhas: estado.update(linhas=linhas))
+            estado['situacao'] = 'concluída'
+        except Exception as e:
+            estado.update(situacao='erro', erro=f'{type(e).__name__}: {e}')
+
+    with _trava:
+        _exportacoes[id_exportacao] = estado
+        # Esquece as exportações terminadas mais antigas (os arquivos continuam no disco)
+        for antiga in [i for i, e in _exportacoes.items() if e['situacao'] in ('concluída', 'erro')]:
+            if len(_exportacoes) <= _MAX_EXPORTACOES:
+                break
+            del _exportacoes[antiga]
+    _obter_executor().submit(com_contexto(executar))
+    return id_exportacao
+
+# Cópia do estado de uma exportação (None se o ID não for conhecido)
+def estado_exportacao(id_exportacao):
+    with _trava:
+        estado = _exportacoes.get(id_exportacao)
+        return dict(estado) if estado is not None else None
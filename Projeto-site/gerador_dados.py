@@ -0,0 +1,112 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from carregamento_dados import FONTES
+from ligas import nome_fonte
+from preprocessamento import LIGAS as LIGAS_MANIFESTO, POSICOES
+
+# Gerador de tabelas sintéticas com o mesmo formato dos CSVs do scraping, usado nos benchmarks
+# e para testar o site sem acesso às fontes reais.
+
+LIGAS = {
+    'br': ('Brasil', ['Red Bull Bragantino', 'Palmeiras', 'Flamengo', 'Fortaleza', 'Internacional', 'Botafogo']),
+    'arg': ('Argentina', ['River Plate', 'Boca Juniors', 'Racing', 'Talleres', 'Vélez Sarsfield', 'Estudiantes']),
+    'mex': ('México', ['América', 'Monterrey', 'Tigres UANL', 'Cruz Azul', 'Toluca', 'Pachuca']),
+}
+
+# Métricas base no estilo FBref/Fotmob; variações são geradas até o número pedido de colunas
+METRICAS_BASE = [
+    'Gols', 'Assistências', 'Gols esperados (xG)', 'Assistências esperadas (xAG)', 'Chutes',
+    'Chutes no alvo', 'Passes completos', 'Passes tentados', 'Passes progressivos',
+    'Conduções progressivas', 'Passes para o terço final', 'Passes para a área',
+    'Cruzamentos', 'Dribles completos', 'Dribles tentados', 'Desarmes', 'Desarmes ganhos',
+    'Interceptações', 'Bloqueios', 'Cortes', 'Duelos aéreos ganhos', 'Duelos aéreos perdidos',
+    'Recuperações de bola', 'Faltas cometidas', 'Faltas sofridas', 'Ações que levam a chute',
+    'Ações que levam a gol', 'Toques na área adversária', 'Perdas de posse', 'Erros que levam a chute',
+]
+METRICAS_GOLEIRO = [
+    'Defesas', 'Gols sofridos', 'Porcentagem de defesas', 'Jogos sem sofrer gols',
+    'Pênaltis defendidos', 'Gols sofridos esperados (PSxG)', 'Cruzamentos interceptados',
+    'Ações defensivas fora da área', 'Lançamentos completos', 'Tiros de meta',
+]
+VARIACOES = ['', ' por 90 minutos', ' (percentil)', ' no último terço', ' sob pressão', ' em jogos fora', ' em jogos em casa',
+             ' no primeiro tempo', ' no segundo tempo', ' (média móvel)']
+
+# Nomes de n colunas de métricas, combinando as métricas base com as variações
+def nomes_metricas(n, goleiros=False):
+    base = (METRICAS_GOLEIRO + METRICAS_BASE) if goleiros else METRICAS_BASE
+    nomes = [f'{metrica}{variacao}' for variacao in VARIACOES for metrica in base]
+    while len(nomes) < n:
+        nomes += [f'{nome} #{len(nomes) // len(base)}' for nome in nomes[:n - len(nomes)]]
+    return nomes[:n]
+
+# Tabela de uma liga: identificadores, metadados e métricas correlacionadas com os minutos
+def gerar_liga(n_jogadores, n_metricas, liga='br', goleiros=False, semente=0, ruido_tipos=False):
+    rng = np.random.default_rng(semente)
+    # Ligas do manifesto sem dados fictícios definidos recebem país e times genéricos
+    pais, times = LIGAS.get(liga, (liga.upper(), [f'Time {liga.upper()} {i}' for i in range(1, 7)]))
+    posicoes = ['Goleiro'] if goleiros else POSICOES[1:]
+    idade = rng.integers(17, 38, n_jogadores)
+    jogos = rng.integers(1, 39, n_jogadores)
+    minutos = (jogos * rng.uniform(20, 90, n_jogadores)).round().astype(int)
+
+    df = pd.DataFrame({
+        'Nome do jogador': [f'Jogador {liga.upper()}{"G" if goleiros else ""} {i}' for i in range(n_jogadores)],
+        'País do jogador': rng.choice([pais, 'Brasil', 'Argentina', 'Uruguai', 'Colômbia'], n_jogadores, p=[0.6, 0.1, 0.1, 0.1, 0.1]),
+        'Posição do jogador': rng.choice(posicoes, n_jogadores),
+        'Time do jogador': rng.choice(times, n_jogadores),
+        'Idade': idade,
+        'Ano de nascimento': 2024 - idade,
+        'Jogos disputados': jogos,
+        'Jogos iniciados pelo jogador': np.minimum(jogos, rng.integers(0, 39, n_jogadores)),
+        'Minutos jogados': minutos,
+        'Minutos jogados divididos por 90': (minutos / 90).round(1),
+    })
+
+    # Contagens proporcionais aos minutos, com taxas diferentes por métrica
+    taxas = rng.gamma(2.0, 0.5, n_metricas)
+    valores = rng.poisson(np.outer(minutos / 90, taxas)).astype(float)
+    metricas = pd.DataFrame(valores, columns=nomes_metricas(n_metricas, goleiros))
+    df = pd.concat([df, metricas], axis=1)
+
+    # Opcionalmente imita os problemas de tipo das ligas estrangeiras ('-' em colunas numéricas)
+    if ruido_tipos:
+        for col in metricas.columns[::5]:
+            faltantes = rng.random(n_jogadores) < 0.02
+            df[col] = df[col].astype(object)
+            df.loc[faltantes, col] = '-'
+    return df
+
+# As fontes do manifesto (jogadores e goleiros de cada liga), com n_jogadores divididos entre as ligas;
+# as ligas depois da primeira imitam os problemas de tipo das ligas estrangeiras
+def gerar_fontes(n_jogadores, n_metricas, semente=0):
+    fontes = {}
+    por_liga = max(1, n_jogadores // len(LIGAS_MANIFESTO))
+    for i, liga in enumerate(LIGAS_MANIFESTO):
+        fontes[nome_fonte('jogadores', liga)] = gerar_liga(
+            por_liga, n_metricas, liga, semente=semente + i, ruido_tipos=i > 0
+        )
+        fontes[nome_fonte('goleiros', liga)] = gerar_liga(
+            max(1, por_liga // 10), n_metricas, liga, goleiros=True, semente=semente + 10 + i
+        )
+    return {nome: fontes[nome] for nome in FONTES}
+
+# Grava as fontes sintéticas como CSV (ex.: para servir com python -m http.server)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera CSVs sintéticos no formato do scraping.')
+    parser.add_argument('--jogadores', type=int, default=1000)
+    parser.add_argument('--metricas', type=int, default=40)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', default='dados_sinteticos')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.saida, exist_ok=True)
+    for nome, df in gerar_fontes(args.jogadores, args.metricas, args.semente).items():
+        df.to_csv(os.path.join(args.saida, f'{nome}.csv'), index=False)
+    print(f'CSVs gravados em {args.saida}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import os
+import threading
+
+import pandas as pd
+
+from perfil_execucao import etapa
+from motor_similaridade import calcular_similaridades, colunas_destaque, get_default_weight
+from preprocessamento import COLUNA_ID
+from snapshots import abrir_snapshot, carregar_posicao, diretorio_versao, ler_manifesto
+from tarefas import em_segundo_plano
+
+# Quantidade de vizinhos guardados por jogador (a página exibe os 30 primeiros)
+K_VIZINHOS = 50
+
+# Colunas removidas pela página de similaridade de jogadores antes da seleção de métricas
+COLUNAS_REMOVIDAS = ['Posição do jogador', 'Minutos jogados']
+
+# Índices já carregados em memória: {(posição, versão, k): {ID do jogador: DataFrame}}
+_indices = {}
+# Construções em segundo plano: {(posição, versão, k): Future}
+_construcoes = {}
+_trava = threading.Lock()
+
+def _caminho_indice(posicao, versao, k):
+    return os.path.join(diretorio_versao(posicao, versao), f'vizinhos_k{k}.pkl')
+
+# Consulta padrão de um jogador (ID): suas 12 colunas de destaque com pesos 5/3/1
+def consulta_padrao(df_final, jogador):
+    top_columns = colunas_destaque(df_final, jogador)
+    pesos = {col: int(get_default_weight(col, top_columns)) for col in top_columns}
+    return top_columns, pesos
+
+# Top-K da consulta padrão de um jogador, com as seis similaridades e a Similaridade Total
+# (k=None devolve todos os jogadores)
+def vizinhos_padrao(df_final, jogador, k=K_VIZINHOS, cache=True):
+    top_columns, pesos = consulta_padrao(df_final, jogador)
+    df_normalized = df_final[[COLUNA_ID, 'Nome do jogador'] + top_columns]
+    return calcular_similaridades(df_normalized, jogador, pesos, n=k, cache=cache)
+
+# Pré-calcula os vizinhos de todos os jogadores da posição e grava junto ao snapshot atual.
+# As consultas de cada jogador não passam pelo cache de consultas, que guarda as da página.
+def construir_indice(posicao, k=K_VIZINHOS):
+    df_final, manifesto = abrir_snapshot(posicao, excluir=COLUNAS_REMOVIDAS)
+    if df_final is None:
+        carregar_posicao(posicao)
+        df_final, manifesto = abrir_snapshot(posicao, excluir=COLUNAS_REMOVIDAS)
+
+    partes = []
+    for jogador in df_final[COLUNA_ID]:
+        vizinhos = vizinhos_padrao(df_final, jogador, k, cache=False)
+        vizinhos.insert(0, 'ID consultado', jogador)
+        partes.append(vizinhos)
+    indice = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=['ID consultado'])
+
+    caminho = _caminho_indice(posicao, manifesto['versao'], k)
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    indice.to_pickle(temporario)
+    os.replace(temporario, caminho)
+    return indice
+
+# Agenda a construção do índice no pool de trabalho (uma por posição, versão e k)
+def _agendar_construcao(posicao, versao, k):
+    chave = (posicao, versao, k)
+    with _trava:
+        for antiga in [c for c, futuro in _construcoes.items() if futuro.done()]:
+            del _construcoes[antiga]
+        if chave not in _construcoes:
+            _construcoes[chave] = em_segundo_plano(construir_indice, posicao, k)
+        return _construcoes[chave]
+
+# Índice da versão atual dos dados. Se ainda não foi gravado para essa versão, a construção
+# (O(N²)) é agendada em segundo plano e devolve None: a página calcula a consulta diretamente
+# até o índice ficar pronto.
+def carregar_indice(posicao, k=K_VIZINHOS):
+    manifesto = ler_manifesto(posicao)
+    if manifesto is None:
+        return None
+    chave = (posicao, manifesto['versao'], k)
+    with _trava:
+        if chave in _indices:
+            return _indices[chave]
+    caminho = _caminho_indice(posicao, manifesto['versao'], k)
+    if not os.path.exists(caminho):
+        _agendar_construcao(posicao, manifesto['versao'], k)
+        return None
+
+    indice = pd.read_pickle(caminho)
+    agrupado = {
+        jogador: grupo.drop(columns='ID consultado').reset_index(drop=True)
+        for jogador, grupo in indice.groupby('ID consultado', sort=False)
+    }
+    with _trava:
+        # Descarta índices de versões anteriores desta posição
+        for antiga in [c for c in _indices if c[0] == posicao and c != chave]:
+            del _indices[antiga]
+        return _indices.setdefault(chave, agrupado)
+
+# Resultado pré-calculado da consulta padrão de um jogador pelo ID (ou None se não houver no índice)
+def buscar_vizinhos(posicao, jogador, k=K_VIZINHOS):
+    with etapa('buscar_vizinhos', posicao=posicao) as registro:
+        indice = carregar_indice(posicao, k)
+        encontrado = indice is not None and jogador in indice
+        registro['cache'] = 'hit' if encontrado else 'miss'
+    return indice[jogador].copy() if encontrado else None
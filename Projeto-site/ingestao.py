@@ -0,0 +1,36 @@
+import argparse
+import json
+
+from carregamento_dados import divergencias_esquema
+from indice_vizinhos import K_VIZINHOS, construir_indice
+from percentis import construir_tabela_percentis
+from preprocessamento import POSICOES
+from snapshots import DIRETORIO_SNAPSHOTS, executar_ingestao
+
+# Ingestão offline: roda o pré-processamento uma vez e grava um snapshot por posição,
+# seguido da tabela de percentis e do índice de vizinhos da consulta padrão.
+# Uso: python Projeto-site/ingestao.py [--posicoes Goleiro Atacante] [--sem-indice]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera os snapshots normalizados por posição.')
+    parser.add_argument('--posicoes', nargs='+', default=POSICOES, choices=POSICOES,
+                        help='Posições a processar (padrão: todas)')
+    parser.add_argument('--sem-indice', action='store_true',
+                        help='Não pré-calcula o índice de vizinhos')
+    parser.add_argument('--k', type=int, default=K_VIZINHOS,
+                        help=f'Vizinhos guardados por jogador (padrão: {K_VIZINHOS})')
+    args = parser.parse_args(argv)
+
+    for manifesto in executar_ingestao(posicoes=args.posicoes):
+        print(f"{manifesto['posicao']}: {manifesto['linhas']} jogadores, "
+              f"{len(manifesto['colunas_numericas'])} métricas, versão {manifesto['versao']}")
+        construir_tabela_percentis(manifesto['posicao'])
+        if not args.sem_indice:
+            construir_indice(manifesto['posicao'], k=args.k)
+    # Fontes baixadas nesta ingestão que não seguem o esquema dos dados
+    for nome, divergencias in divergencias_esquema().items():
+        if divergencias:
+            print(f'Divergências do esquema em {nome}: {json.dumps(divergencias, ensure_ascii=False)}')
+    print(f'Snapshots gravados em {DIRETORIO_SNAPSHOTS}')
+
+if __name__ == '__main__':
+    main()
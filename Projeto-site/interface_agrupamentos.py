@@ -0,0 +1,45 @@
+import streamlit as st
+
+from agrupamento import ler_predefinicoes, nomes_invalidos, salvar_predefinicao
+
+# Limite de agrupamentos na interface (a API aceita qualquer quantidade)
+MAX_AGRUPAMENTOS = 20
+
+# Widgets da seção de agrupamento, compartilhados pelas páginas: predefinição salva da posição,
+# quantidade de agrupamentos e, para cada um, nome e colunas (cada coluna entra em um só
+# agrupamento). Nomes repetidos ou iguais aos de uma coluna (identificação do jogador ou
+# métrica) ganham o número do agrupamento. Devolve {nome do agrupamento: colunas}, incluindo
+# os vazios.
+def definir_agrupamentos(colunas_interesse, posicao):
+    predefinicoes = ler_predefinicoes(posicao)
+    escolha = st.selectbox('Predefinição de agrupamentos', [''] + sorted(predefinicoes), index=0,
+                           help='Agrupamentos salvos para esta posição')
+    predefinicao = list(predefinicoes.get(escolha, {}).items())
+    quantidade = st.number_input('Quantidade de agrupamentos', min_value=1, max_value=MAX_AGRUPAMENTOS,
+                                 value=max(3, len(predefinicao)), step=1, key=f'quantidade_agrupamentos_{escolha}')
+
+    agrupamentos = {}
+    usadas = []
+    for i in range(int(quantidade)):
+        nome_padrao, colunas_padrao = predefinicao[i] if i < len(predefinicao) else (f'Agrupamento {i + 1}', [])
+        opcoes = [col for col in colunas_interesse if col not in usadas]
+        coluna_nome, coluna_colunas = st.columns([1, 3])
+        nome = coluna_nome.text_input(f'Nome do agrupamento {i + 1}', value=nome_padrao,
+                                      key=f'nome_agrupamento_{i}_{escolha}').strip() or nome_padrao
+        colunas = coluna_colunas.multiselect(f'Agrupamento {i + 1}', opcoes,
+                                             default=[col for col in colunas_padrao if col in opcoes],
+                                             key=f'agrupamento_{i}_{escolha}', help="Deixe vazio para 'Não agrupar'")
+        if nomes_invalidos([nome], colunas_interesse):
+            st.warning(f"'{nome}' já é o nome de uma coluna; o agrupamento {i + 1} foi renomeado.")
+        while nome in agrupamentos or nomes_invalidos([nome], colunas_interesse):
+            nome = f'{nome} ({i + 1})'
+        agrupamentos[nome] = colunas
+        usadas += colunas
+
+    # Salvar os agrupamentos atuais como predefinição da posição
+    with st.expander('Salvar agrupamentos'):
+        nome_predefinicao = st.text_input('Nome da predefinição', value=escolha)
+        if st.button('Salvar predefinição', disabled=not (nome_predefinicao and any(agrupamentos.values()))):
+            salvar_predefinicao(posicao, nome_predefinicao, agrupamentos)
+            st.success(f"Predefinição '{nome_predefinicao}' salva para {posicao}.")
+    return agrupamentos
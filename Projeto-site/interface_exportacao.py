@@ -0,0 +1,52 @@
+import os
+
+import streamlit as st
+
+from exportacao import FORMATOS_EXPORTACAO, blocos_tabela, estado_exportacao, iniciar_exportacao
+
+# Arquivos maiores que isto não são oferecidos para download pelo navegador (o caminho no
+# servidor continua sendo exibido)
+LIMITE_DOWNLOAD_MB = 200
+# Exportações mais recentes da sessão exibidas na seção
+MAX_EXPORTACOES_EXIBIDAS = 5
+
+def _resultado_em_blocos(calcular):
+    return blocos_tabela(calcular())
+
+# Seção de exportação compartilhada pelas páginas. calcular() devolve o resultado completo
+# (todas as linhas, com as similaridades numéricas); gerar_matriz(), se informada, devolve
+# os blocos da matriz de similaridade da posição. As duas rodam em segundo plano, e as
+# exportações mais recentes desta sessão aparecem com a situação atual. Só o arquivo escolhido
+# para download é lido, e apenas enquanto estiver escolhido.
+def secao_exportacao(nome, calcular, gerar_matriz=None):
+    with st.expander('Exportar resultados'):
+        formato = st.selectbox('Formato de exportação', FORMATOS_EXPORTACAO)
+        exportacoes = st.session_state.setdefault('exportacoes', [])
+        if st.button('Exportar resultado completo'):
+            exportacoes.append(iniciar_exportacao(lambda: _resultado_em_blocos(calcular), nome, formato))
+        if gerar_matriz is not None and st.button('Exportar matriz de similaridade da posição'):
+            exportacoes.append(iniciar_exportacao(gerar_matriz, f'{nome}_matriz', formato))
+
+        estados = [estado for estado in map(estado_exportacao, reversed(exportacoes)) if estado is not None]
+        estados = estados[:MAX_EXPORTACOES_EXIBIDAS]
+        if not estados:
+            return
+        st.button('Atualizar situação das exportações')
+        disponiveis = {}
+        for estado in estados:
+            arquivo = os.path.basename(estado['caminho'])
+            if estado['situacao'] == 'erro':
+                st.error(f"{arquivo}: {estado['erro']}")
+            elif estado['situacao'] != 'concluída':
+                st.info(f"{arquivo}: {estado['situacao']} ({estado['linhas']} linhas gravadas)")
+            else:
+                tamanho_mb = os.path.getsize(estado['caminho']) / 2**20
+                st.success(f"{arquivo}: {estado['linhas']} linhas ({tamanho_mb:.1f} MB) em {estado['caminho']}")
+                if tamanho_mb <= LIMITE_DOWNLOAD_MB:
+                    disponiveis[arquivo] = estado
+
+        if disponiveis:
+            arquivo = st.selectbox('Arquivo para baixar', [''] + list(disponiveis), key=f'baixar_{nome}')
+            if arquivo:
+                with open(disponiveis[arquivo]['caminho'], 'rb') as f:
+                    st.download_button(f'Baixar {arquivo}', f.read(), file_name=arquivo)
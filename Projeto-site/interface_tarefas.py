@@ -0,0 +1,34 @@
+import streamlit as st
+
+from tarefas import Tarefa
+
+# Executa um cálculo progressivo no pool de trabalho e mostra, enquanto ele roda, o progresso
+# e os n melhores resultados parciais. gerar() devolve um gerador de (processados, total,
+# DataFrame parcial), como motor_similaridade.similaridades_progressivas; o último parcial
+# é o resultado devolvido. A tarefa é cancelada se a execução da página for interrompida
+# (ex.: o usuário mudou uma entrada, o que inicia uma nova execução).
+def calcular_com_progresso(gerar, coluna_total, n=30):
+    barra = st.empty()
+    espaco = st.empty()
+    tarefa = Tarefa(gerar)
+    resultado = None
+    fracao, texto = 0.0, 'Na fila de cálculo'
+    try:
+        for parcial in tarefa.parciais():
+            # Sem novidades, o progresso é reenviado; cada envio permite ao Streamlit
+            # interromper esta execução se houver outra na fila
+            if parcial is not None:
+                processados, total, resultado = parcial
+                fracao = processados / total if total else 1.0
+                texto = f'{processados} de {total} jogadores calculados'
+                if processados < total:
+                    df_parcial = resultado.head(n)[['Nome do jogador', coluna_total]].copy()
+                    df_parcial[coluna_total] = (df_parcial[coluna_total] * 100).round(2).astype(str) + '%'
+                    espaco.dataframe(df_parcial, use_container_width=True)
+            barra.progress(fracao, text=texto)
+    finally:
+        if not tarefa.concluida():
+            tarefa.cancelar()
+        barra.empty()
+        espaco.empty()
+    return resultado
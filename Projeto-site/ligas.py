@@ -0,0 +1,49 @@
+import json
+import os
+
+# Manifesto das ligas (ligas.json): cada liga tem um código (usado nos IDs dos jogadores e
+# nos nomes das fontes), um nome e os arquivos CSV de jogadores de linha e, opcionalmente,
+# de goleiros. Arquivos sem esquema ('https://...') são relativos à URL base das fontes.
+# Os tipos das colunas vêm do esquema dos dados (esquema.py), iguais para todas as ligas.
+# BRAGANTINO_LIGAS aponta para outro manifesto (ex.: com mais competições).
+CAMINHO_MANIFESTO = os.environ.get(
+    'BRAGANTINO_LIGAS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ligas.json')
+)
+
+# Lê e valida um manifesto de ligas
+def ler_manifesto_ligas(caminho=CAMINHO_MANIFESTO):
+    with open(caminho, encoding='utf-8') as f:
+        manifesto = json.load(f)
+    codigos = [liga.get('codigo') for liga in manifesto.get('ligas', [])]
+    if not codigos:
+        raise ValueError(f'Nenhuma liga definida em {caminho}')
+    if len(set(codigos)) != len(codigos) or not all(codigos):
+        raise ValueError(f'Códigos de liga ausentes ou repetidos em {caminho}: {codigos}')
+    for liga in manifesto['ligas']:
+        if 'jogadores' not in liga:
+            raise ValueError(f"Liga '{liga['codigo']}' sem o arquivo de jogadores em {caminho}")
+    return manifesto
+
+MANIFESTO_LIGAS = ler_manifesto_ligas()
+
+# Códigos das ligas, na ordem do manifesto
+LIGAS = [liga['codigo'] for liga in MANIFESTO_LIGAS['ligas']]
+
+# Nome da fonte de uma liga ('jogadores' ou 'goleiros'): ex.: 'df_jogadores_br'
+def nome_fonte(tipo, liga):
+    return f'df_{tipo}_{liga}'
+
+# Nomes das fontes de um tipo ('jogadores' ou 'goleiros') definidas no manifesto
+def fontes_do_tipo(tipo, manifesto=MANIFESTO_LIGAS):
+    return [nome_fonte(tipo, liga['codigo']) for liga in manifesto['ligas'] if tipo in liga]
+
+# URLs das fontes do manifesto: {nome da fonte: URL}, jogadores de linha antes dos goleiros
+def fontes_manifesto(url_base, manifesto=MANIFESTO_LIGAS):
+    fontes = {}
+    for tipo in ('jogadores', 'goleiros'):
+        for liga in manifesto['ligas']:
+            if tipo in liga:
+                arquivo = liga[tipo]
+                fontes[nome_fonte(tipo, liga['codigo'])] = arquivo if '://' in arquivo else f'{url_base}/{arquivo}'
+    return fontes
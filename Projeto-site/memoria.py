@@ -0,0 +1,74 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Modo compacto (BRAGANTINO_COMPACTO=1): snapshots com métricas em float32 e textos
+# repetidos como categorias, reduzindo a memória de cada sessão. Desligado por padrão,
+# porque o float32 altera as similaridades a partir da 7ª casa decimal.
+MODO_COMPACTO = os.environ.get('BRAGANTINO_COMPACTO', '0') == '1'
+TIPO_METRICAS = np.float32 if MODO_COMPACTO else np.float64
+
+# Colunas de texto com poucos valores distintos, guardadas como categorias no modo compacto
+COLUNAS_CATEGORICAS = ['País do jogador', 'Posição do jogador', 'Time do jogador']
+
+# Versão compacta de uma tabela: categorias nas colunas de texto repetidas, float32 nas
+# colunas float e o menor tipo inteiro que comporta cada coluna inteira
+def compactar(df, colunas_categoricas=COLUNAS_CATEGORICAS):
+    df = df.copy()
+    for col in colunas_categoricas:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+# Memória ocupada por uma tabela, em bytes (inclui o conteúdo das strings)
+def uso_memoria(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+# Relatório de memória de um conjunto de tabelas ({nome: DataFrame}): tamanho atual e
+# tamanho na representação compacta
+def relatorio_memoria(tabelas):
+    linhas = []
+    for nome, df in tabelas.items():
+        atual = uso_memoria(df)
+        compacto = uso_memoria(compactar(df))
+        linhas.append({
+            'tabela': nome,
+            'linhas': len(df),
+            'colunas': df.shape[1],
+            'memoria_mb': atual / 2 ** 20,
+            'compacto_mb': compacto / 2 ** 20,
+            'reducao': 1 - compacto / atual if atual else 0.0,
+        })
+    relatorio = pd.DataFrame(linhas)
+    total = {col: relatorio[col].sum() for col in ['linhas', 'colunas', 'memoria_mb', 'compacto_mb']}
+    total['reducao'] = 1 - total['compacto_mb'] / total['memoria_mb'] if total['memoria_mb'] else 0.0
+    return pd.concat([relatorio, pd.DataFrame([{'tabela': 'total', **total}])], ignore_index=True)
+
+# Uso: python Projeto-site/memoria.py [--fontes]
+# Mostra a memória das tabelas por posição (como as páginas as carregam) e, com --fontes,
+# das fontes brutas mantidas no cache do processo
+def main(argv=None):
+    from carregamento_dados import carregar_fontes
+    from preprocessamento import POSICOES
+    from snapshots import carregar_posicao
+
+    parser = argparse.ArgumentParser(description='Relatório de memória das tabelas de jogadores.')
+    parser.add_argument('--fontes', action='store_true', help='Inclui as fontes brutas do cache')
+    args = parser.parse_args(argv)
+
+    tabelas = {posicao: carregar_posicao(posicao) for posicao in POSICOES}
+    if args.fontes:
+        tabelas.update(carregar_fontes())
+    print(f"Modo compacto: {'ligado' if MODO_COMPACTO else 'desligado'} (BRAGANTINO_COMPACTO)")
+    with pd.option_context('display.width', 200):
+        print(relatorio_memoria(tabelas).round(3).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
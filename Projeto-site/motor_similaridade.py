@@ -0,0 +1,353 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from perfil_execucao import etapa, formato
+from preprocessamento import ATRIBUTO_VERSAO, COLUNA_ID
+
+# Cálculo progressivo (similaridades_progressivas): os candidatos da posição são divididos
+# em BLOCOS_PROGRESSIVOS blocos de pelo menos MIN_CANDIDATOS_POR_BLOCO jogadores, para que as
+# páginas mostrem resultados parciais e o cancelamento valha no meio do cálculo
+BLOCOS_PROGRESSIVOS = int(os.environ.get('BRAGANTINO_BLOCOS_PROGRESSIVOS', 8))
+MIN_CANDIDATOS_POR_BLOCO = int(os.environ.get('BRAGANTINO_CANDIDATOS_POR_BLOCO', 250))
+
+# Jogador (ID ou nome) que não está na tabela; é um KeyError, para quem já trata esse caso
+class JogadorNaoEncontrado(KeyError):
+    pass
+
+# Colunas de similaridade produzidas pelo motor, na ordem usada pelas páginas
+COLUNAS_METRICAS = [
+    'Similaridade de Bray-Curtis',
+    'Similaridade Euclidiana',
+    'Similaridade Cosseno',
+    'Similaridade Manhattan',
+    'Similaridade Canberra',
+    'Similaridade Kulczynski',
+]
+
+# Converte distâncias em similaridade dividindo pela maior distância finita do conjunto
+def _similaridade_por_distancia(distancias):
+    finitas = distancias[np.isfinite(distancias)]
+    max_distancia = finitas.max() if finitas.size else np.nan
+    # Distâncias infinitas recebem a maior distância finita (similaridade zero)
+    distancias = np.where(np.isinf(distancias), max_distancia, distancias)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similaridade = 1 - distancias / max_distancia
+    return np.clip(similaridade, 0, 1)
+
+# Quantidades por coluna entre o vetor de consulta e cada linha da matriz que não dependem
+# dos pesos. Com pesos w, cada termo das seis métricas é o termo sem peso multiplicado por
+# |w|, w² ou sign(w), então uma mudança de pesos vira apenas produtos matriz-vetor.
+class ConsultaPreparada:
+    def __init__(self, consulta, matriz):
+        consulta = np.asarray(consulta, dtype=float).ravel()
+        matriz = np.asarray(matriz, dtype=float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.diferencas = np.abs(matriz - consulta)
+            somas = matriz + consulta
+            self.somas_absolutas = np.abs(somas)
+            self.diferencas_quadrado = self.diferencas * self.diferencas
+            self.produtos = matriz * consulta
+            self.quadrados = matriz * matriz
+            self.quadrados_consulta = consulta * consulta
+
+            # Canberra: termos 0/0 (e colunas de peso zero) são ignorados
+            razoes_canberra = self.diferencas / (np.abs(matriz) + np.abs(consulta))
+            self.razoes_canberra = np.where(np.isnan(razoes_canberra), 0.0, razoes_canberra)
+
+            # Kulczynski: razão diferença/soma, zero onde a soma é nula; NaN só vem de valores
+            # faltantes e fica fora da média independentemente dos pesos
+            razoes = np.where(somas != 0, self.diferencas / somas, 0.0)
+            faltantes = np.isnan(razoes)
+            self.razoes_kulczynski = np.where(faltantes, 0.0, razoes)
+            self.validos_kulczynski = (~faltantes).sum(axis=1)
+
+    # Junta as consultas preparadas de blocos consecutivos de linhas da mesma matriz
+    @classmethod
+    def concatenar(cls, partes):
+        preparada = cls.__new__(cls)
+        for nome, valor in vars(partes[0]).items():
+            if nome != 'quadrados_consulta':
+                valor = np.concatenate([getattr(parte, nome) for parte in partes])
+            setattr(preparada, nome, valor)
+        return preparada
+
+    # As seis métricas para um vetor de pesos antes da normalização pelo conjunto de jogadores:
+    # similaridades de Bray-Curtis, cosseno e Kulczynski e distâncias euclidiana, Manhattan e
+    # Canberra. Retorna um dicionário {coluna de similaridade: array}.
+    def metricas_brutas(self, pesos):
+        pesos = np.asarray(pesos, dtype=float).ravel()
+        pesos_absolutos = np.abs(pesos)
+        pesos_quadrado = pesos * pesos
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Bray-Curtis: soma das diferenças sobre a soma dos valores absolutos
+            distancia_manhattan = self.diferencas @ pesos_absolutos
+            bray_curtis = 1 - distancia_manhattan / (self.somas_absolutas @ pesos_absolutos)
+
+            # Euclidiana e Manhattan: distâncias normalizadas pela maior distância
+            distancia_euclidiana = np.sqrt(self.diferencas_quadrado @ pesos_quadrado)
+
+            # Cosseno: vetores de norma zero têm similaridade zero
+            normas = np.sqrt(self.quadrados @ pesos_quadrado) * np.sqrt(self.quadrados_consulta @ pesos_quadrado)
+            produto = self.produtos @ pesos_quadrado
+            cosseno = np.where(normas != 0, produto / normas, 0.0)
+
+            # Canberra: soma das razões das colunas com peso
+            distancia_canberra = self.razoes_canberra @ (pesos != 0).astype(float)
+
+            # Kulczynski: média das razões (sem valores faltantes); sem colunas válidas é NaN
+            kulczynski = 1 - (self.razoes_kulczynski @ np.sign(pesos)) / self.validos_kulczynski
+
+        return {
+            'Similaridade de Bray-Curtis': bray_curtis,
+            'Similaridade Euclidiana': distancia_euclidiana,
+            'Similaridade Cosseno': cosseno,
+            'Similaridade Manhattan': distancia_manhattan,
+            'Similaridade Canberra': distancia_canberra,
+            'Similaridade Kulczynski': kulczynski,
+        }
+
+    # As seis similaridades para um vetor de pesos. Retorna um dicionário {coluna de similaridade: array}.
+    def metricas(self, pesos):
+        return normalizar_metricas(self.metricas_brutas(pesos))
+
+# Similaridades finais a partir das métricas brutas de um conjunto de jogadores: as distâncias
+# são divididas pela maior distância finita do conjunto e tudo é limitado a [0, 1]
+def normalizar_metricas(brutas):
+    return {
+        'Similaridade de Bray-Curtis': np.clip(brutas['Similaridade de Bray-Curtis'], 0, 1),
+        'Similaridade Euclidiana': _similaridade_por_distancia(brutas['Similaridade Euclidiana']),
+        'Similaridade Cosseno': np.clip(brutas['Similaridade Cosseno'], 0, 1),
+        'Similaridade Manhattan': _similaridade_por_distancia(brutas['Similaridade Manhattan']),
+        'Similaridade Canberra': _similaridade_por_distancia(brutas['Similaridade Canberra']),
+        'Similaridade Kulczynski': np.clip(brutas['Similaridade Kulczynski'], 0, 1),
+    }
+
+# Consultas preparadas recentemente (LRU), reaproveitadas quando só os pesos mudam (ex.:
+# sliders). O limite é em bytes (BRAGANTINO_CACHE_CONSULTAS_MB): cada consulta guarda sete
+# matrizes jogadores x colunas, e uma consulta maior que o limite não é guardada.
+LIMITE_CACHE_CONSULTAS = int(float(os.environ.get('BRAGANTINO_CACHE_CONSULTAS_MB', 512)) * 2**20)
+_consultas = OrderedDict()
+_bytes_consultas = 0
+_trava = threading.Lock()
+
+# Linhas da tabela: um RangeIndex pelos seus limites; outro índice (ex.: um subconjunto de
+# linhas de uma tabela versionada, que mantém a versão) pelo hash dos rótulos
+def _assinatura_linhas(indice):
+    if isinstance(indice, pd.RangeIndex):
+        return indice.start, indice.stop, indice.step
+    return hashlib.blake2b(pd.util.hash_pandas_object(indice, index=False).to_numpy().tobytes(),
+                           digest_size=16).hexdigest()
+
+# Chave da consulta: a versão da tabela (DataFrame.attrs), as linhas, as colunas e os
+# jogadores escolhidos identificam a consulta e os candidatos; sem versão, o hash dos valores
+def _chave_consulta(df_normalized, jogadores_escolhidos, consulta, matriz):
+    versao = df_normalized.attrs.get(ATRIBUTO_VERSAO)
+    escolhidos = (jogadores_escolhidos,) if isinstance(jogadores_escolhidos, str) else tuple(jogadores_escolhidos)
+    if versao is not None:
+        return (versao, _assinatura_linhas(df_normalized.index), tuple(df_normalized.columns), escolhidos,
+                np.shape(matriz))
+    h = hashlib.blake2b(np.ascontiguousarray(consulta, dtype=float).tobytes(), digest_size=16)
+    h.update(np.ascontiguousarray(matriz, dtype=float).tobytes())
+    return h.hexdigest(), np.shape(matriz)
+
+def _tamanho_consulta(preparada):
+    return sum(valor.nbytes for valor in vars(preparada).values())
+
+def _consulta_em_cache(chave):
+    with _trava:
+        if chave in _consultas:
+            _consultas.move_to_end(chave)
+            return _consultas[chave]
+    return None
+
+def _guardar_consulta(chave, preparada):
+    global _bytes_consultas
+    tamanho = _tamanho_consulta(preparada)
+    if tamanho > LIMITE_CACHE_CONSULTAS:
+        return
+    with _trava:
+        if chave in _consultas:
+            _bytes_consultas -= _tamanho_consulta(_consultas.pop(chave))
+        _consultas[chave] = preparada
+        _bytes_consultas += tamanho
+        while _bytes_consultas > LIMITE_CACHE_CONSULTAS:
+            _, antiga = _consultas.popitem(last=False)
+            _bytes_consultas -= _tamanho_consulta(antiga)
+
+# Consulta preparada para o vetor de consulta e a matriz dados (do cache, se já calculada)
+def obter_consulta(chave, consulta, matriz):
+    preparada = _consulta_em_cache(chave)
+    if preparada is None:
+        with etapa('preparar_consulta', cache='miss', **formato(matriz)):
+            preparada = ConsultaPreparada(consulta, matriz)
+        _guardar_consulta(chave, preparada)
+    return preparada
+
+# Calcula as seis similaridades entre o vetor de consulta e cada linha da matriz de jogadores.
+# Retorna um dicionário {coluna de similaridade: array}.
+def calcular_metricas(consulta, matriz, pesos):
+    return ConsultaPreparada(consulta, matriz).metricas(pesos)
+
+# Pesos de cada similaridade na Similaridade Total
+PESOS_METRICAS = {
+    'Similaridade de Bray-Curtis': 5,
+    'Similaridade Euclidiana': 1,
+    'Similaridade Cosseno': 1,
+    'Similaridade Manhattan': 1,
+    'Similaridade Canberra': 1,
+    'Similaridade Kulczynski': 1,
+}
+
+# Índices em ordem decrescente de valores (NaN no fim, empates na ordem original). Com n,
+# só os n primeiros: uma seleção parcial evita ordenar todos os valores.
+def _ordem_decrescente(valores, n=None):
+    chave = -valores
+    if n is None or n >= len(chave):
+        return np.argsort(chave, kind='stable')
+    if n <= 0:
+        return np.array([], dtype=int)
+    limite = np.partition(chave, n - 1)[n - 1]
+    if np.isnan(limite):
+        dentro, empates = ~np.isnan(chave), np.isnan(chave)
+    else:
+        dentro, empates = chave < limite, chave == limite
+    selecionados = np.flatnonzero(dentro)
+    selecionados = np.concatenate([selecionados, np.flatnonzero(empates)[:n - len(selecionados)]])
+    return selecionados[np.argsort(chave[selecionados], kind='stable')]
+
+# Linhas dos jogadores pelo ID, com o índice hash do pandas em vez de comparar strings
+# linha a linha (IDs ausentes ou repetidos são ignorados)
+def posicoes_jogadores(df, ids):
+    posicoes = pd.Index(df[COLUNA_ID]).get_indexer(list(ids))
+    return np.unique(posicoes[posicoes >= 0])
+
+# Vetor de consulta (o jogador escolhido, pelo ID, ou a média de um conjunto de jogadores,
+# lista de IDs), os demais jogadores (candidatos) e as colunas numéricas
+def _separar_consulta(df_normalized, jogadores_escolhidos):
+    # Seleciona as colunas numéricas
+    numeric_columns = df_normalized.select_dtypes(include='number').columns
+
+    # Separa o(s) jogador(es) escolhido(s) dos demais jogadores
+    if isinstance(jogadores_escolhidos, str):
+        posicoes = posicoes_jogadores(df_normalized, [jogadores_escolhidos])
+        if not len(posicoes):
+            raise JogadorNaoEncontrado(f'Jogador não encontrado: {jogadores_escolhidos}')
+        consulta = df_normalized[numeric_columns].values[posicoes[0]]
+    else:
+        # Vários jogadores: a consulta é a média dos selecionados
+        posicoes = posicoes_jogadores(df_normalized, jogadores_escolhidos)
+        consulta = df_normalized[numeric_columns].iloc[posicoes].mean().values
+    mascara_candidatos = np.ones(len(df_normalized), dtype=bool)
+    mascara_candidatos[posicoes] = False
+    return consulta, df_normalized[mascara_candidatos], numeric_columns
+
+# Tabela de resultado ordenada pela coluna_total a partir das similaridades das primeiras
+# linhas dos candidatos (todas, ou as já calculadas em um cálculo por blocos)
+def _montar_resultado(df_candidatos, metricas, coluna_total, n):
+    total_linhas = len(metricas['Similaridade de Bray-Curtis'])
+    with etapa('montar_resultado', linhas=total_linhas):
+        # Similaridade total (média ponderada); Bray-Curtis sem preenchimento de NaN
+        total = metricas['Similaridade de Bray-Curtis'] * PESOS_METRICAS['Similaridade de Bray-Curtis']
+        for coluna in COLUNAS_METRICAS[1:]:
+            total = total + np.nan_to_num(metricas[coluna], nan=0.0) * PESOS_METRICAS[coluna]
+        total = np.clip(total / sum(PESOS_METRICAS.values()), 0, 1)
+
+        # Uma linha por jogador (ID), inclusive homônimos
+        ordem = _ordem_decrescente(total, n)
+        df_similaridade = pd.DataFrame({
+            COLUNA_ID: df_candidatos[COLUNA_ID].values[ordem],
+            'Nome do jogador': df_candidatos['Nome do jogador'].values[ordem],
+        })
+        for coluna in COLUNAS_METRICAS:
+            df_similaridade[coluna] = metricas[coluna][ordem]
+        df_similaridade[coluna_total] = total[ordem]
+    return df_similaridade
+
+# Calcula as similaridades de todos os jogadores em relação ao jogador escolhido (ID) ou
+# à média de um conjunto de jogadores (lista de IDs), combinadas na coluna_total.
+# Com n, devolve apenas os n jogadores de maior coluna_total. Com cache=False a consulta
+# preparada não passa pelo cache (ex.: exportações que consultam todos os jogadores).
+def calcular_similaridades(df_normalized, jogadores_escolhidos, pesos, coluna_total='Similaridade Total', n=None,
+                           cache=True):
+    consulta, df_candidatos, numeric_columns = _separar_consulta(df_normalized, jogadores_escolhidos)
+
+    # Calcula as seis similaridades; as quantidades sem peso da consulta ficam em cache,
+    # então mudar só os pesos não refaz as operações por elemento
+    matriz = df_candidatos[numeric_columns].values
+    if cache:
+        chave = _chave_consulta(df_normalized, jogadores_escolhidos, consulta, matriz)
+        preparada = obter_consulta(chave, consulta, matriz)
+    else:
+        preparada = ConsultaPreparada(consulta, matriz)
+    with etapa('calcular_metricas', linhas=len(df_candidatos), colunas=len(numeric_columns)):
+        metricas = preparada.metricas([pesos[col] for col in numeric_columns])
+
+    return _montar_resultado(df_candidatos, metricas, coluna_total, n)
+
+# Mesmo cálculo de calcular_similaridades, por blocos de candidatos_por_bloco jogadores (padrão:
+# a fração 1/BLOCOS_PROGRESSIVOS dos candidatos, com o mínimo MIN_CANDIDATOS_POR_BLOCO): a cada
+# bloco gera (candidatos processados, total de candidatos, resultado parcial). O parcial
+# normaliza as distâncias pelos jogadores já processados; o último é o resultado final.
+# Se a consulta já estiver em cache (ex.: só os pesos mudaram) há um único bloco; senão, as
+# partes preparadas são guardadas no cache ao fim.
+def similaridades_progressivas(df_normalized, jogadores_escolhidos, pesos, coluna_total='Similaridade Total', n=None,
+                               candidatos_por_bloco=None):
+    consulta, df_candidatos, numeric_columns = _separar_consulta(df_normalized, jogadores_escolhidos)
+    matriz = df_candidatos[numeric_columns].values
+    if candidatos_por_bloco is None:
+        candidatos_por_bloco = max(MIN_CANDIDATOS_POR_BLOCO, -(-len(matriz) // BLOCOS_PROGRESSIVOS))
+    vetor_pesos = [pesos[col] for col in numeric_columns]
+    chave = _chave_consulta(df_normalized, jogadores_escolhidos, consulta, matriz)
+    preparada = _consulta_em_cache(chave)
+    if preparada is not None:
+        with etapa('calcular_metricas', linhas=len(matriz), colunas=len(numeric_columns)):
+            metricas = preparada.metricas(vetor_pesos)
+        yield len(matriz), len(matriz), _montar_resultado(df_candidatos, metricas, coluna_total, n)
+        return
+
+    partes = []
+    brutas = {coluna: np.empty(len(matriz)) for coluna in COLUNAS_METRICAS}
+    for inicio in range(0, max(len(matriz), 1), candidatos_por_bloco):
+        fim = min(inicio + candidatos_por_bloco, len(matriz))
+        with etapa('calcular_bloco', linhas=fim - inicio, colunas=len(numeric_columns)):
+            partes.append(ConsultaPreparada(consulta, matriz[inicio:fim]))
+            for coluna, valores in partes[-1].metricas_brutas(vetor_pesos).items():
+                brutas[coluna][inicio:fim] = valores
+            metricas = normalizar_metricas({coluna: valores[:fim] for coluna, valores in brutas.items()})
+        yield fim, len(matriz), _montar_resultado(df_candidatos, metricas, coluna_total, n)
+    _guardar_consulta(chave, ConsultaPreparada.concatenar(partes))
+
+# Colunas de destaque de um jogador (ID): as n métricas com maiores valores normalizados
+def colunas_destaque(df_final, jogador, n=12):
+    posicoes = posicoes_jogadores(df_final, [jogador])
+    if not len(posicoes):
+        return []
+    player_data = df_final.select_dtypes(include=np.number).iloc[posicoes[0]]
+    return player_data.sort_values(ascending=False).head(n).index.tolist()
+
+# Peso padrão de uma coluna: 5 para as 4 melhores, 3 para as intermediárias e 1 para as demais
+def get_default_weight(col, top_columns):
+    if col in top_columns[:4]:
+        return 5.0
+    elif col in top_columns[4:8]:
+        return 3.0
+    elif col in top_columns[8:12]:
+        return 1.0
+    else:
+        return 1.0
+
+# Colunas de destaque de um conjunto de jogadores (IDs): maior valor de cada métrica entre eles
+def colunas_destaque_multiplos(df_final, jogadores, n=12):
+    player_data = df_final.iloc[posicoes_jogadores(df_final, jogadores)]
+    if player_data.empty:
+        return []
+    numeric_cols = player_data.select_dtypes(include=np.number)
+    max_values = numeric_cols.max(axis=0)  # Usar o valor máximo em vez da média
+    return max_values.sort_values(ascending=False).head(n).index.tolist()
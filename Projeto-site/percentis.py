@@ -0,0 +1,146 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from memoria import TIPO_METRICAS
+from motor_similaridade import posicoes_jogadores
+from perfil_execucao import etapa, formato
+from preprocessamento import COLUNA_ID, POSICOES
+from snapshots import abrir_snapshot, carregar_posicao, diretorio_versao, ler_manifesto
+
+# Tabela de percentis por posição: para cada jogador e coluna numérica, a fração dos jogadores
+# da posição com valor menor ou igual (empates recebem a média das posições, como em
+# DataFrame.rank(pct=True)). É calculada uma vez por versão dos dados, gravada junto ao
+# snapshot e usada por consulta direta na escolha das colunas de destaque e na classificação
+# por percentil.
+
+# Tabelas já carregadas em memória: {(posição, versão): DataFrame}. A trava geral só protege
+# os dicionários; a leitura ou o cálculo da tabela de uma posição acontece sob a trava dela.
+_tabelas = {}
+_travas_posicao = {}
+_trava = threading.Lock()
+
+def _trava_posicao(posicao):
+    with _trava:
+        return _travas_posicao.setdefault(posicao, threading.Lock())
+
+def _caminho_tabela(posicao, versao):
+    return os.path.join(diretorio_versao(posicao, versao), 'percentis.pkl')
+
+# Percentis de cada coluna de uma matriz (jogadores x colunas) com um argsort por coluna,
+# feito sobre a transposta contígua; NaN continuam NaN e não contam no total da coluna
+def calcular_percentis(matriz):
+    valores = np.ascontiguousarray(np.asarray(matriz, dtype=float).T)
+    n_colunas, n_linhas = valores.shape
+    if n_linhas == 0:
+        return np.full((n_linhas, n_colunas), np.nan)
+
+    # argsort leva os NaN para o fim de cada coluna; empates recebem a média das posições,
+    # então a ordem entre eles não importa
+    ordem = np.argsort(valores, axis=1)
+    ordenados = np.take_along_axis(valores, ordem, axis=1)
+    posicoes = np.broadcast_to(np.arange(n_linhas), valores.shape)
+
+    # Início e fim de cada bloco de valores iguais, propagados para todas as posições do bloco
+    novo_bloco = np.ones(valores.shape, dtype=bool)
+    novo_bloco[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    fim_bloco = np.ones(valores.shape, dtype=bool)
+    fim_bloco[:, :-1] = novo_bloco[:, 1:]
+    inicio = np.maximum.accumulate(np.where(novo_bloco, posicoes, 0), axis=1)
+    fim = np.minimum.accumulate(np.where(fim_bloco, posicoes, n_linhas - 1)[:, ::-1], axis=1)[:, ::-1]
+
+    validos = (~np.isnan(valores)).sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentis_ordenados = ((inicio + fim) / 2 + 1) / validos
+    percentis_ordenados[np.isnan(ordenados)] = np.nan
+    percentis = np.empty(valores.shape)
+    np.put_along_axis(percentis, ordem, percentis_ordenados, axis=1)
+    return percentis.T
+
+# Tabela de percentis de uma posição: ID, nome e o percentil de cada coluna numérica
+def tabela_percentis(df_final):
+    colunas = df_final.select_dtypes(include='number').columns.tolist()
+    with etapa('calcular_percentis', **formato(df_final)):
+        percentis = calcular_percentis(df_final[colunas].to_numpy(dtype=float)).astype(TIPO_METRICAS)
+    df_percentis = pd.DataFrame(percentis, columns=colunas)
+    return pd.concat([df_final[[COLUNA_ID, 'Nome do jogador']].reset_index(drop=True), df_percentis], axis=1)
+
+# Calcula a tabela de percentis da posição e grava junto ao snapshot atual
+def construir_tabela_percentis(posicao):
+    df_final, manifesto = abrir_snapshot(posicao)
+    if df_final is None:
+        carregar_posicao(posicao)
+        df_final, manifesto = abrir_snapshot(posicao)
+    tabela = tabela_percentis(df_final)
+
+    caminho = _caminho_tabela(posicao, manifesto['versao'])
+    temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+    tabela.to_pickle(temporario)
+    os.replace(temporario, caminho)
+    return tabela
+
+# Tabela da versão atual dos dados; é reconstruída automaticamente quando a versão muda.
+# Posições sem snapshot (ex.: a seleção vazia da página) têm a tabela calculada na hora.
+def carregar_percentis(posicao):
+    if posicao not in POSICOES:
+        return tabela_percentis(carregar_posicao(posicao))
+    manifesto = ler_manifesto(posicao)
+    if manifesto is None:
+        carregar_posicao(posicao)
+        manifesto = ler_manifesto(posicao)
+    chave = (posicao, manifesto['versao'])
+    with etapa('carregar_percentis', posicao=posicao) as registro:
+        with _trava:
+            tabela = _tabelas.get(chave)
+        registro['cache'] = 'hit' if tabela is not None else 'miss'
+        if tabela is not None:
+            return tabela
+        with _trava_posicao(posicao):
+            # Outra sessão pode ter carregado a tabela enquanto esta esperava
+            with _trava:
+                tabela = _tabelas.get(chave)
+            if tabela is None:
+                caminho = _caminho_tabela(posicao, manifesto['versao'])
+                tabela = pd.read_pickle(caminho) if os.path.exists(caminho) else construir_tabela_percentis(posicao)
+                with _trava:
+                    # Descarta tabelas de versões anteriores desta posição
+                    for antiga in [c for c in _tabelas if c[0] == posicao]:
+                        del _tabelas[antiga]
+                    _tabelas[chave] = tabela
+        return tabela
+
+# As n colunas em que o jogador (ID) tem os maiores percentis na posição, entre as colunas
+# informadas (padrão: todas); empates seguem a ordem das colunas
+def colunas_destaque_percentil(tabela, jogador, colunas=None, n=12):
+    if tabela is None:
+        return []
+    posicoes = posicoes_jogadores(tabela, [jogador])
+    if not len(posicoes):
+        return []
+    colunas = tabela.columns[2:].tolist() if colunas is None else [col for col in colunas if col in tabela.columns]
+    percentis = tabela[colunas].iloc[posicoes[0]]
+    return percentis.sort_values(ascending=False, kind='stable').head(n).index.tolist()
+
+# Classificação pelo percentil médio ponderado das colunas, consultado na tabela de percentis
+# sem calcular distâncias. Cada agrupamento entra com a média dos percentis de suas colunas.
+# Colunas sem valor (NaN) ficam de fora da média do jogador.
+def classificar_por_percentil(tabela, pesos, agrupamentos=None, coluna_total='Classificação', n=None):
+    if tabela is None:
+        raise ValueError('Tabela de percentis indisponível: use carregar_percentis(posicao)')
+    agrupamentos = agrupamentos or {}
+    df_percentis = pd.DataFrame({
+        chave: tabela[agrupamentos.get(chave) or [chave]].astype(float).mean(axis=1)
+        for chave in pesos
+    })
+    valores = df_percentis.to_numpy(dtype=float)
+    w = np.array([pesos[chave] for chave in df_percentis.columns], dtype=float)
+    soma_pesos = (~np.isnan(valores)) @ w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = np.where(soma_pesos > 0, np.nan_to_num(valores) @ w / soma_pesos, np.nan)
+
+    resultado = pd.concat([tabela[[COLUNA_ID, 'Nome do jogador']], df_percentis], axis=1)
+    resultado[coluna_total] = total
+    resultado = resultado.sort_values(coluna_total, ascending=False, kind='stable')
+    return (resultado if n is None else resultado.head(n)).reset_index(drop=True)
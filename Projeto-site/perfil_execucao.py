@@ -0,0 +1,93 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+# Instrumentação das etapas de cada execução (rerun) das páginas: cada etapa é cronometrada,
+# registrada na execução atual (para o painel da barra lateral) e emitida como uma linha JSON
+# no logger 'bragantino.perfil'.
+# BRAGANTINO_PERFIL_LOG: '0' desliga as linhas de log, um caminho grava em arquivo
+# e qualquer outro valor (ou ausência) escreve na saída de erro.
+
+logger = logging.getLogger('bragantino.perfil')
+
+def _configurar_logger():
+    destino = os.environ.get('BRAGANTINO_PERFIL_LOG', '1')
+    if destino == '0' or logger.handlers:
+        return
+    handler = logging.FileHandler(destino, encoding='utf-8') if destino != '1' else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_configurar_logger()
+
+# Execução atual: {'execucao', 'pagina', 'inicio', 'contexto', 'etapas'}; None fora das páginas
+_execucao = contextvars.ContextVar('execucao_perfil', default=None)
+
+# Inicia o registro de uma nova execução da página (chamado no início de cada rerun)
+def iniciar_execucao(pagina):
+    execucao = {
+        'execucao': uuid.uuid4().hex[:12],
+        'pagina': pagina,
+        'inicio': time.perf_counter(),
+        'contexto': {},
+        'etapas': [],
+    }
+    _execucao.set(execucao)
+    return execucao
+
+# Acrescenta informações (ex.: posição) a todas as etapas seguintes da execução atual
+def anotar(**informacoes):
+    execucao = _execucao.get()
+    if execucao is not None:
+        execucao['contexto'].update(informacoes)
+
+# Formato (linhas, colunas) de um DataFrame ou array, para anotar uma etapa
+def formato(dados):
+    shape = getattr(dados, 'shape', (len(dados),))
+    return {'linhas': int(shape[0]), 'colunas': int(shape[1]) if len(shape) > 1 else 1}
+
+# Cronometra uma etapa. O dicionário devolvido pode receber informações durante a etapa
+# (ex.: registro['cache'] = 'hit' ou registro.update(formato(df))). Fora de uma execução
+# das páginas (CLI, benchmarks) nada é registrado.
+@contextmanager
+def etapa(nome, **informacoes):
+    execucao = _execucao.get()
+    registro = {'etapa': nome, **informacoes}
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        if execucao is not None:
+            registro['segundos'] = time.perf_counter() - inicio
+            registro = {**execucao['contexto'], **registro}
+            execucao['etapas'].append(registro)
+            if logger.isEnabledFor(logging.INFO):
+                linha = {'execucao': execucao['execucao'], 'pagina': execucao['pagina'], 'evento': 'etapa', **registro}
+                logger.info(json.dumps(linha, ensure_ascii=False, default=str))
+
+# Executa funcao(*args) em outra thread (ex.: ThreadPoolExecutor) mantendo a execução atual
+def com_contexto(funcao):
+    contexto = contextvars.copy_context()
+    return lambda *args, **kwargs: contexto.copy().run(funcao, *args, **kwargs)
+
+# Painel opcional na barra lateral com os tempos das etapas da execução atual
+def mostrar_painel():
+    import pandas as pd
+    import streamlit as st
+
+    execucao = _execucao.get()
+    if execucao is None or not st.sidebar.checkbox('Mostrar tempos das etapas', key='perfil_execucao'):
+        return
+    total = time.perf_counter() - execucao['inicio']
+    st.sidebar.caption(f"Execução {execucao['execucao']}: {total:.3f} s")
+    if execucao['etapas']:
+        df = pd.DataFrame(execucao['etapas'])
+        colunas = ['etapa', 'segundos'] + [col for col in ['cache', 'posicao', 'linhas', 'colunas'] if col in df.columns]
+        st.sidebar.dataframe(df[colunas].round({'segundos': 4}), hide_index=True, use_container_width=True)
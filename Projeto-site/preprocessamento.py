@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from ligas import LIGAS, fontes_do_tipo, nome_fonte
+from perfil_execucao import etapa, formato
+
+# Posições disponíveis nas páginas
+POSICOES = ['Goleiro', 'Defensor', 'Meio-campista', 'Atacante']
+
+# Chave única de cada jogador ('liga:time:nome'), usada no lugar do nome nas consultas
+COLUNA_ID = 'ID do jogador'
+
+# Atributo (DataFrame.attrs) com a versão dos valores de uma tabela da posição (ex.: a versão
+# do snapshot); o pandas o mantém em seleções de colunas e linhas, e quem deriva valores
+# novos (ex.: componentes PCA) grava uma versão própria. Os caches das consultas usam a versão
+# em vez de calcular o hash dos valores; tabelas sem ela recorrem ao hash.
+ATRIBUTO_VERSAO = 'versao_dados'
+
+# As ligas (LIGAS, do manifesto ligas.json) estão na ordem de fontes_preparadas['jogadores'];
+# goleiros são normalizados em conjunto, sob a chave GOLEIROS
+GOLEIROS = 'goleiros'
+
+# Processos para preparar as ligas em paralelo (BRAGANTINO_PROCESSOS; 0 ou 1 = no próprio
+# processo). Abaixo de MIN_LINHAS_PROCESSOS linhas, enviar as tabelas aos processos custa
+# mais do que prepará-las aqui.
+PROCESSOS = int(os.environ.get('BRAGANTINO_PROCESSOS', min(len(LIGAS), os.cpu_count() or 1)))
+MIN_LINHAS_PROCESSOS = int(os.environ.get('BRAGANTINO_PROCESSOS_MIN_LINHAS', 100_000))
+
+# Pool de processos criado no primeiro uso e reaproveitado pelas ingestões seguintes
+_executor = None
+_trava_executor = threading.Lock()
+
+# Escala min-max das colunas numéricas para [a, 1]. Os mínimos e máximos ajustados ficam
+# guardados, então novas linhas (ex.: jogadores recém-coletados) podem ser transformadas
+# sem reajustar, e podem ser salvos e lidos em JSON.
+class Normalizador:
+    def __init__(self, a=0.01, colunas=None, minimos=None, maximos=None):
+        self.a = a
+        self.colunas = colunas
+        self.minimos = None if minimos is None else np.asarray(minimos, dtype=float)
+        self.maximos = None if maximos is None else np.asarray(maximos, dtype=float)
+
+    # Mínimo e máximo de todas as colunas numéricas de uma vez (NaN são ignorados)
+    def ajustar(self, df):
+        # Os tipos vêm de uma fatia vazia, sem copiar os dados como select_dtypes faria
+        self.colunas = df.iloc[:0].select_dtypes(include='number').columns.tolist()
+        valores = df[self.colunas].to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            # Colunas sem nenhum valor ficam com mínimo e máximo NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.minimos = np.nanmin(valores, axis=0) if len(valores) else np.full(len(self.colunas), np.nan)
+            self.maximos = np.nanmax(valores, axis=0) if len(valores) else np.full(len(self.colunas), np.nan)
+        return self
+
+    # Aplica a escala sobre a matriz contígua das colunas ajustadas, com operações no próprio
+    # array; colunas constantes recebem o valor a
+    def transformar(self, df):
+        escalados = df[self.colunas].to_numpy(dtype=float, copy=True)
+        amplitude = self.maximos - self.minimos
+        with np.errstate(divide='ignore', invalid='ignore'):
+            escalados -= self.minimos
+            escalados /= amplitude
+            escalados *= 1 - self.a
+            escalados += self.a
+        escalados[:, amplitude == 0] = self.a
+        df_normalized = pd.DataFrame(escalados, index=df.index, columns=self.colunas)
+        outras = df.drop(columns=self.colunas)
+        return pd.concat([outras, df_normalized], axis=1)[df.columns]
+
+    def para_dict(self):
+        return {
+            'a': self.a,
+            'colunas': self.colunas,
+            'minimos': [None if np.isnan(v) else v for v in self.minimos.tolist()],
+            'maximos': [None if np.isnan(v) else v for v in self.maximos.tolist()],
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        minimos = [np.nan if v is None else v for v in dados['minimos']]
+        maximos = [np.nan if v is None else v for v in dados['maximos']]
+        return cls(dados['a'], dados['colunas'], minimos, maximos)
+
+# Grava e lê um conjunto de normalizadores ({chave: Normalizador}) em JSON
+def salvar_normalizadores(normalizadores, caminho):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({chave: n.para_dict() for chave, n in normalizadores.items()}, f, ensure_ascii=False)
+
+def ler_normalizadores(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return {chave: Normalizador.de_dict(dados) for chave, dados in json.load(f).items()}
+
+# Função para normalizar os dados
+def normalize_df(df):
+    return Normalizador().ajustar(df).transformar(df)
+
+# Filtro por minutos jogados (25% dos minutos máximos jogados)
+def filtrar_minutos(df, fracao=0.25):
+    min_minutes = fracao * df['Minutos jogados'].max()
+    return df.loc[df['Minutos jogados'] > min_minutes]
+
+# IDs dos jogadores da tabela de uma liga. Repetições da mesma chave (mesmo nome no
+# mesmo time) recebem um sufixo ':2', ':3', ...
+def ids_jogadores(df, liga):
+    times = df['Time do jogador'].astype(str) if 'Time do jogador' in df.columns else ''
+    ids = liga + ':' + times + ':' + df['Nome do jogador'].astype(str)
+    repeticao = ids.groupby(ids).cumcount()
+    return ids.where(repeticao == 0, ids + ':' + (repeticao + 1).astype(str))
+
+# Insere a coluna de ID no início da tabela de uma liga
+def adicionar_ids(df, liga):
+    ids = ids_jogadores(df, liga)
+    df = df.copy()
+    df.insert(0, COLUNA_ID, ids.values)
+    return df
+
+# Fontes necessárias para uma posição: arquivos de goleiros para 'Goleiro' e de jogadores
+# de linha para as demais
+def fontes_posicao(posicao):
+    return fontes_do_tipo('goleiros' if posicao == 'Goleiro' else 'jogadores')
+
+# Prepara a tabela de jogadores de linha de uma liga: ID de cada jogador e filtro de minutos;
+# com uma posição, só as linhas dela são mantidas. Os tipos e os faltantes já vêm tratados
+# pelo esquema na leitura das fontes. IDs e o limite de minutos continuam considerando a
+# liga inteira. Roda em um processo do pool quando há várias ligas.
+def preparar_liga(df, liga, posicao=None, fracao=0.25):
+    ids = ids_jogadores(df, liga)
+    minutos = df['Minutos jogados']
+    linhas = minutos > fracao * minutos.max()
+    if posicao is not None:
+        linhas &= df['Posição do jogador'] == posicao
+    df = df.loc[linhas].copy()
+    df.insert(0, COLUNA_ID, ids[linhas].values)
+    return df
+
+def _executor_processos():
+    global _executor
+    with _trava_executor:
+        if _executor is None:
+            # 'spawn' evita copiar as threads do servidor (Streamlit) para os processos filhos
+            _executor = ProcessPoolExecutor(max_workers=PROCESSOS, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+def _descartar_executor():
+    global _executor
+    with _trava_executor:
+        _executor = None
+
+# Aplica preparar_liga a cada (df, liga, posição), em paralelo no pool quando compensa;
+# se o pool quebrar (ex.: processo filho encerrado), refaz no próprio processo
+def _preparar_ligas(tarefas):
+    linhas = sum(len(tarefa[0]) for tarefa in tarefas)
+    if PROCESSOS > 1 and len(tarefas) > 1 and linhas >= MIN_LINHAS_PROCESSOS:
+        with etapa('preparar_ligas', ligas=len(tarefas), processos=PROCESSOS, linhas=linhas):
+            try:
+                return list(_executor_processos().map(preparar_liga, *zip(*tarefas)))
+            except BrokenProcessPool:
+                _descartar_executor()
+    return [preparar_liga(*tarefa) for tarefa in tarefas]
+
+# Aplica IDs e filtro de minutos às fontes carregadas, liga a liga.
+# Com uma posição, basta receber as fontes dela (fontes_posicao) e só as linhas da
+# posição são preparadas.
+def preparar_fontes(fontes, posicao=None):
+    fontes_preparadas = {}
+    if posicao != 'Goleiro':
+        fontes_preparadas['jogadores'] = _preparar_ligas([
+            (fontes[nome_fonte('jogadores', liga)], liga, posicao) for liga in LIGAS
+        ])
+
+    if posicao is None or posicao == 'Goleiro':
+        # Concatenar os dados de goleiros (o filtro de minutos considera todas as ligas)
+        df_goleiros = pd.concat(
+            [
+                adicionar_ids(fontes[nome_fonte('goleiros', liga)], liga)
+                for liga in LIGAS if nome_fonte('goleiros', liga) in fontes
+            ],
+            ignore_index=True
+        )
+        fontes_preparadas['goleiros'] = filtrar_minutos(df_goleiros)
+    return fontes_preparadas
+
+# Tabelas da posição antes da normalização: {liga: DataFrame} ou {GOLEIROS: DataFrame}
+def _tabelas_posicao(fontes_preparadas, posicao):
+    if posicao == 'Goleiro':
+        return {GOLEIROS: fontes_preparadas['goleiros']}
+    return {
+        liga: df[df['Posição do jogador'] == posicao]
+        for liga, df in zip(LIGAS, fontes_preparadas['jogadores'])
+    }
+
+# Normalizadores ajustados da posição: um por liga (goleiros: um para todas as ligas)
+def ajustar_normalizadores(fontes_preparadas, posicao):
+    return {
+        chave: Normalizador().ajustar(df)
+        for chave, df in _tabelas_posicao(fontes_preparadas, posicao).items()
+    }
+
+# Filtra a posição e normaliza cada liga separadamente (goleiros são normalizados em conjunto).
+# Sem normalizadores, a escala é ajustada aos próprios dados.
+def preparar_posicao(fontes_preparadas, posicao, normalizadores=None):
+    with etapa('normalize_df', posicao=posicao) as registro:
+        tabelas = _tabelas_posicao(fontes_preparadas, posicao)
+        if normalizadores is None:
+            normalizadores = {chave: Normalizador().ajustar(df) for chave, df in tabelas.items()}
+        dfs_posicao = [normalizadores[chave].transformar(df) for chave, df in tabelas.items()]
+        df_final = pd.concat(dfs_posicao, ignore_index=True)
+        registro.update(formato(df_final))
+    return df_final
@@ -0,0 +1,111 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from indice_vizinhos import COLUNAS_REMOVIDAS, vizinhos_padrao
+from preprocessamento import COLUNA_ID, POSICOES
+from snapshots import carregar_posicao
+
+# Quantidade de substitutos por jogador do elenco no relatório
+N_SUBSTITUTOS = 10
+
+# DataFrames por posição já abertos em cada processo de trabalho
+_dfs_posicao = {}
+
+def _df_posicao(posicao):
+    if posicao not in _dfs_posicao:
+        _dfs_posicao[posicao] = carregar_posicao(posicao, excluir=COLUNAS_REMOVIDAS)
+    return _dfs_posicao[posicao]
+
+# ID e posição de cada jogador do elenco, procurando o ID ou o nome nos dados de cada
+# posição (um nome com homônimos gera uma entrada por jogador); devolve também os não encontrados
+def localizar_posicoes(jogadores):
+    posicoes = {}
+    encontrados = set()
+    for posicao in POSICOES:
+        df = _df_posicao(posicao)
+        ids_por_nome = df.groupby('Nome do jogador')[COLUNA_ID].agg(list)
+        ids = set(df[COLUNA_ID])
+        for jogador in jogadores:
+            ids_jogador = [jogador] if jogador in ids else ids_por_nome.get(jogador, [])
+            for id_jogador in ids_jogador:
+                posicoes.setdefault(id_jogador, posicao)
+                encontrados.add(jogador)
+    return posicoes, [jogador for jogador in jogadores if jogador not in encontrados]
+
+# IDs dos jogadores de um time, em todas as posições
+def jogadores_do_time(time):
+    jogadores = []
+    for posicao in POSICOES:
+        df = _df_posicao(posicao)
+        if 'Time do jogador' in df.columns:
+            jogadores += df.loc[df['Time do jogador'] == time, COLUNA_ID].tolist()
+    return jogadores
+
+# Substitutos de um jogador: a mesma consulta padrão da página de similaridade
+# (12 colunas de destaque com pesos 5/3/1), opcionalmente sem colegas do mesmo time
+def substitutos_jogador(jogador, posicao, n=N_SUBSTITUTOS, excluir_time=False):
+    df_final = _df_posicao(posicao)
+    df_similaridade = vizinhos_padrao(df_final, jogador, k=None)
+    jogadores = df_final.set_index(COLUNA_ID)
+
+    if 'Time do jogador' in df_final.columns:
+        times = jogadores['Time do jogador']
+        df_similaridade.insert(2, 'Time do jogador', df_similaridade[COLUNA_ID].map(times).values)
+        if excluir_time:
+            time_jogador = times.get(jogador)
+            df_similaridade = df_similaridade[df_similaridade['Time do jogador'] != time_jogador]
+
+    df_similaridade = df_similaridade.head(n).reset_index(drop=True)
+    df_similaridade.insert(0, 'Ranking', range(1, len(df_similaridade) + 1))
+    df_similaridade.insert(0, 'Posição', posicao)
+    df_similaridade.insert(0, 'ID do jogador do elenco', jogador)
+    df_similaridade.insert(0, 'Jogador do elenco', jogadores.at[jogador, 'Nome do jogador'])
+    return df_similaridade
+
+def _tarefa(argumentos):
+    return substitutos_jogador(*argumentos)
+
+# Gera o relatório consolidado de substitutos, distribuindo os jogadores em um pool de processos
+def gerar_relatorio(jogadores, n=N_SUBSTITUTOS, excluir_time=False, processos=None):
+    posicoes, nao_encontrados = localizar_posicoes(jogadores)
+    tarefas = [(jogador, posicao, n, excluir_time) for jogador, posicao in posicoes.items()]
+
+    if not tarefas:
+        return pd.DataFrame(), nao_encontrados
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        resultados = list(executor.map(_tarefa, tarefas))
+    return pd.concat(resultados, ignore_index=True), nao_encontrados
+
+# Uso: python Projeto-site/relatorio_elenco.py --time "Red Bull Bragantino" --saida substitutos.csv
+#      python Projeto-site/relatorio_elenco.py --jogadores "Jogador A" "Jogador B" --saida substitutos.csv
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Relatório de substitutos para uma lista de jogadores.')
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument('--time', help='Usa todos os jogadores deste time como elenco')
+    origem.add_argument('--jogadores', nargs='+', help='Nomes dos jogadores do elenco')
+    origem.add_argument('--arquivo', help='Arquivo texto com um jogador por linha')
+    parser.add_argument('--saida', default='relatorio_substitutos.csv', help='Arquivo CSV de saída')
+    parser.add_argument('-n', type=int, default=N_SUBSTITUTOS, help=f'Substitutos por jogador (padrão: {N_SUBSTITUTOS})')
+    parser.add_argument('--excluir-time', action='store_true', help='Não sugere jogadores do mesmo time')
+    parser.add_argument('--processos', type=int, default=os.cpu_count(), help='Número de processos')
+    args = parser.parse_args(argv)
+
+    if args.time:
+        jogadores = jogadores_do_time(args.time)
+    elif args.arquivo:
+        with open(args.arquivo, encoding='utf-8') as f:
+            jogadores = [linha.strip() for linha in f if linha.strip()]
+    else:
+        jogadores = args.jogadores
+
+    relatorio, nao_encontrados = gerar_relatorio(jogadores, args.n, args.excluir_time, args.processos)
+    relatorio.to_csv(args.saida, index=False)
+    print(f'{relatorio["ID do jogador do elenco"].nunique() if len(relatorio) else 0} jogadores processados, relatório em {args.saida}')
+    for jogador in nao_encontrados:
+        print(f'Jogador não encontrado: {jogador}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+from carregamento_dados import carregar_fontes
+from consultas import (
+    COLUNAS_REMOVIDAS_MULTIPLOS, classificar_jogadores, jogadores_similares, jogadores_similares_multiplos
+)
+from indice_vizinhos import COLUNAS_REMOVIDAS
+from motor_similaridade import JogadorNaoEncontrado
+from percentis import carregar_percentis
+from perfil_execucao import anotar, etapa, iniciar_execucao
+from preprocessamento import POSICOES, fontes_posicao
+from snapshots import abrir_snapshot, executar_ingestao, ler_manifesto
+
+# Serviço HTTP/JSON local com as consultas do site (similares a um jogador, similares a um
+# conjunto de jogadores e classificação pelo 'Jogador Máximo'). As tabelas de cada posição
+# ficam em memória entre as requisições e são trocadas quando a ingestão grava uma nova
+# versão do snapshot. O serviço não renova dados pela rede: usa os snapshots locais (ou o
+# cache local das fontes, se a posição ainda não tiver snapshot).
+# Uso: python Projeto-site/servico.py [--host 127.0.0.1] [--porta 8765] [--sem-aquecimento]
+#   curl -s localhost:8765/similares -d '{"posicao": "Atacante", "jogador": "Nome", "n": 10}'
+HOST = os.environ.get('BRAGANTINO_SERVICO_HOST', '127.0.0.1')
+PORTA = int(os.environ.get('BRAGANTINO_SERVICO_PORTA', 8765))
+# Consultas calculadas ao mesmo tempo; as demais requisições esperam a vez
+CONSULTAS_SIMULTANEAS = int(os.environ.get('BRAGANTINO_SERVICO_CONSULTAS', os.cpu_count() or 1))
+# Linhas devolvidas quando a requisição não informa n (n nulo devolve todas)
+N_PADRAO = 30
+# Latências guardadas por rota para o resumo de /metricas
+JANELA_LATENCIAS = 1000
+
+# Tabelas das posições mantidas em memória: {(posição, colunas excluídas): (versão, DataFrame)}.
+# A trava geral só protege o dicionário; abrir ou gerar a tabela de uma posição (que pode
+# incluir a ingestão) acontece sob a trava da posição, sem bloquear as demais posições.
+class TabelasPosicao:
+    def __init__(self):
+        self._tabelas = {}
+        self._travas_posicao = {}
+        self._trava = threading.Lock()
+
+    def _trava_posicao(self, posicao):
+        with self._trava:
+            return self._travas_posicao.setdefault(posicao, threading.Lock())
+
+    # Tabela em memória se ainda for a da versão atual do snapshot (ou None)
+    def _atual(self, chave):
+        manifesto = ler_manifesto(chave[0])
+        with self._trava:
+            atual = self._tabelas.get(chave)
+        if atual is not None and manifesto is not None and atual[0] == manifesto['versao']:
+            return atual[1]
+        return None
+
+    # Tabela da versão atual do snapshot (aberta só na primeira vez ou após uma nova ingestão);
+    # quem espera pela trava da posição encontra a tabela aberta por outra requisição
+    def tabela(self, posicao, excluir):
+        chave = (posicao, tuple(excluir))
+        df_final = self._atual(chave)
+        if df_final is not None:
+            return df_final
+        with self._trava_posicao(posicao):
+            df_final = self._atual(chave)
+            if df_final is not None:
+                return df_final
+            df_final, manifesto = abrir_snapshot(posicao, excluir=excluir)
+            if df_final is None:
+                # Sem snapshot: gera a partir das cópias locais das fontes, mesmo vencidas
+                executar_ingestao(carregar_fontes(fontes_posicao(posicao), ttl=float('inf')), [posicao])
+                df_final, manifesto = abrir_snapshot(posicao, excluir=excluir)
+            with self._trava:
+                self._tabelas[chave] = (manifesto['versao'], df_final)
+            return df_final
+
+    # Versão e tamanho das tabelas em memória
+    def resumo(self):
+        with self._trava:
+            return [
+                {'posicao': posicao, 'versao': versao, 'linhas': len(df), 'colunas': df.shape[1],
+                 'colunas_excluidas': list(excluir)}
+                for (posicao, excluir), (versao, df) in self._tabelas.items()
+            ]
+
+# Latências recentes de cada rota (em segundos) e contagem de requisições e erros
+class Latencias:
+    def __init__(self, janela=JANELA_LATENCIAS):
+        self._janela = janela
+        self._amostras = {}
+        self._contagens = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, rota, segundos, erro=False):
+        with self._trava:
+            self._amostras.setdefault(rota, deque(maxlen=self._janela)).append(segundos)
+            contagem = self._contagens.setdefault(rota, {'requisicoes': 0, 'erros': 0})
+            contagem['requisicoes'] += 1
+            contagem['erros'] += int(erro)
+
+    # {rota: requisições, erros e latência média, p50, p95 e máxima (ms) das mais recentes}
+    def resumo(self):
+        with self._trava:
+            amostras = {rota: np.array(valores) * 1000 for rota, valores in self._amostras.items()}
+            contagens = {rota: dict(contagem) for rota, contagem in self._contagens.items()}
+        return {
+            rota: {
+                **contagens[rota],
+                'media_ms': round(float(valores.mean()), 3),
+                'p50_ms': round(float(np.percentile(valores, 50)), 3),
+                'p95_ms': round(float(np.percentile(valores, 95)), 3),
+                'max_ms': round(float(valores.max()), 3),
+            }
+            for rota, valores in amostras.items()
+        }
+
+def _campo(corpo, nome):
+    if nome not in corpo:
+        raise ValueError(f'Campo obrigatório ausente: {nome}')
+    return corpo[nome]
+
+def _posicao(corpo):
+    posicao = _campo(corpo, 'posicao')
+    if posicao not in POSICOES:
+        raise ValueError(f"Posição inválida: {posicao} (use {', '.join(POSICOES)})")
+    return posicao
+
+# Rota inexistente (404)
+class RotaNaoEncontrada(LookupError):
+    pass
+
+# Consultas do serviço sobre as tabelas em memória; cada método recebe o corpo JSON da
+# requisição com os mesmos parâmetros da API de consultas e devolve o DataFrame de resultado
+class ServicoConsultas:
+    def __init__(self, consultas_simultaneas=CONSULTAS_SIMULTANEAS):
+        self.tabelas = TabelasPosicao()
+        self.latencias = Latencias()
+        self._vagas = threading.BoundedSemaphore(consultas_simultaneas)
+        self.rotas = {
+            ('POST', '/similares'): self.similares,
+            ('POST', '/multiplos'): self.multiplos,
+            ('POST', '/classificacao'): self.classificacao,
+            ('GET', '/posicoes'): lambda corpo: self.tabelas.resumo(),
+            ('GET', '/metricas'): lambda corpo: self.latencias.resumo(),
+            ('GET', '/saude'): lambda corpo: {'situacao': 'ok'},
+        }
+
+    # Abre as tabelas e percentis das posições antes das primeiras requisições
+    def aquecer(self, posicoes=POSICOES):
+        for posicao in posicoes:
+            with etapa('aquecer', posicao=posicao):
+                self.tabelas.tabela(posicao, COLUNAS_REMOVIDAS)
+                self.tabelas.tabela(posicao, COLUNAS_REMOVIDAS_MULTIPLOS)
+                carregar_percentis(posicao)
+
+    def similares(self, corpo):
+        posicao = _posicao(corpo)
+        with self._vagas:
+            return jogadores_similares(
+                posicao, _campo(corpo, 'jogador'), corpo.get('colunas'), corpo.get('pesos'),
+                corpo.get('agrupamentos'), corpo.get('n', N_PADRAO), corpo.get('percentis', False),
+                df_final=self.tabelas.tabela(posicao, COLUNAS_REMOVIDAS)
+            )
+
+    def multiplos(self, corpo):
+        posicao = _posicao(corpo)
+        with self._vagas:
+            return jogadores_similares_multiplos(
+                posicao, _campo(corpo, 'jogadores'), corpo.get('colunas'), corpo.get('pesos'),
+                corpo.get('agrupamentos'), corpo.get('n', N_PADRAO),
+                df_final=self.tabelas.tabela(posicao, COLUNAS_REMOVIDAS_MULTIPLOS)
+            )
+
+    def classificacao(self, corpo):
+        posicao = _posicao(corpo)
+        colunas, agrupamentos = corpo.get('colunas') or [], corpo.get('agrupamentos')
+        if not colunas and not (agrupamentos and any(agrupamentos.values())):
+            raise ValueError('A classificação exige colunas ou agrupamentos')
+        por_percentil = corpo.get('percentis', False)
+        with self._vagas:
+            return classificar_jogadores(
+                posicao, colunas, corpo.get('pesos'), agrupamentos, corpo.get('n', N_PADRAO), por_percentil,
+                df_final=None if por_percentil else self.tabelas.tabela(posicao, COLUNAS_REMOVIDAS)
+            )
+
+# Requisições HTTP: corpo e resposta em JSON; resultados tabulares vêm em 'resultado' (uma
+# lista de registros) com a latência em 'segundos' e no cabeçalho Server-Timing.
+# Erros: 404 (rota ou jogador não encontrado), 400 (requisição inválida, inclusive colunas
+# ou métricas inexistentes), 500 (demais).
+class ManipuladorConsultas(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em escritas separadas; sem isto, conexões mantidas abertas
+    # esperam o ACK atrasado do cliente (~40 ms) a cada resposta
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def log_message(self, formato_log, *args):
+        pass
+
+    def _responder(self, status, conteudo, segundos):
+        dados = conteudo.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.send_header('Server-Timing', f'consulta;dur={segundos * 1000:.3f}')
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _atender(self, metodo):
+        servico = self.server.servico
+        rota = urlparse(self.path).path.rstrip('/') or '/'
+        inicio = time.perf_counter()
+        iniciar_execucao('servico')
+        anotar(rota=rota)
+        try:
+            funcao = servico.rotas.get((metodo, rota))
+            if funcao is None:
+                raise RotaNaoEncontrada(f'Rota não encontrada: {metodo} {rota}')
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            try:
+                corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+            except json.JSONDecodeError as e:
+                raise ValueError(f'JSON inválido: {e}') from e
+            if not isinstance(corpo, dict):
+                raise ValueError('O corpo da requisição deve ser um objeto JSON')
+            with etapa('consulta_servico'):
+                resultado = funcao(corpo)
+            segundos = time.perf_counter() - inicio
+            if hasattr(resultado, 'to_json'):
+                conteudo = (f'{{"linhas": {len(resultado)}, "segundos": {segundos:.6f}, '
+                            f'"resultado": {resultado.to_json(orient="records", force_ascii=False)}}}')
+            else:
+                conteudo = json.dumps(resultado, ensure_ascii=False)
+            status = 200
+        except (RotaNaoEncontrada, JogadorNaoEncontrado) as e:
+            status, conteudo = 404, json.dumps({'erro': e.args[0] if e.args else str(e)}, ensure_ascii=False)
+        except (ValueError, KeyError) as e:
+            status, conteudo = 400, json.dumps({'erro': str(e.args[0]) if e.args else str(e)}, ensure_ascii=False)
+        except Exception as e:
+            status, conteudo = 500, json.dumps({'erro': f'{type(e).__name__}: {e}'}, ensure_ascii=False)
+        segundos = time.perf_counter() - inicio
+        servico.latencias.registrar(rota, segundos, erro=status != 200)
+        self._responder(status, conteudo, segundos)
+
+# Servidor com uma thread por conexão, ligado ao serviço de consultas
+def criar_servidor(servico, host=HOST, porta=PORTA):
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorConsultas)
+    servidor.daemon_threads = True
+    servidor.servico = servico
+    return servidor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serviço HTTP/JSON local com as consultas de jogadores.')
+    parser.add_argument('--host', default=HOST, help=f'Endereço (padrão: {HOST})')
+    parser.add_argument('--porta', type=int, default=PORTA, help=f'Porta (padrão: {PORTA})')
+    parser.add_argument('--posicoes', nargs='+', default=POSICOES, choices=POSICOES,
+                        help='Posições carregadas na inicialização (padrão: todas)')
+    parser.add_argument('--sem-aquecimento', action='store_true',
+                        help='Carrega cada posição só na primeira requisição')
+    parser.add_argument('--consultas-simultaneas', type=int, default=CONSULTAS_SIMULTANEAS,
+                        help=f'Consultas calculadas ao mesmo tempo (padrão: {CONSULTAS_SIMULTANEAS})')
+    args = parser.parse_args(argv)
+
+    servico = ServicoConsultas(args.consultas_simultaneas)
+    if not args.sem_aquecimento:
+        servico.aquecer(args.posicoes)
+    servidor = criar_servidor(servico, args.host, args.porta)
+    print(f'Serviço de consultas em http://{args.host}:{servidor.server_port}')
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import weakref
+from collections import Counter
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from carregamento_dados import DIRETORIO_CACHE, TTL_SEGUNDOS, carregar_fontes
+from memoria import MODO_COMPACTO, TIPO_METRICAS, compactar
+from perfil_execucao import etapa, formato
+from preprocessamento import (
+    ATRIBUTO_VERSAO, POSICOES, ajustar_normalizadores, fontes_posicao, ler_normalizadores, preparar_fontes,
+    preparar_posicao, salvar_normalizadores
+)
+
+# Diretório dos snapshots por posição (pode ser alterado por variável de ambiente)
+DIRETORIO_SNAPSHOTS = os.environ.get('BRAGANTINO_SNAPSHOT_DIR', os.path.join(DIRETORIO_CACHE, 'snapshots'))
+
+# Versão do formato dos snapshots; mudanças no pré-processamento ou nos arquivos gravados
+# invalidam os snapshots e índices gravados por versões anteriores
+FORMATO_SNAPSHOT = 3
+
+# Versões substituídas de uma posição só são removidas depois de ESPERA_REMOCAO_SEGUNDOS, para
+# que leitores que acabaram de ler o ATUAL anterior (neste ou em outro processo) terminem
+ESPERA_REMOCAO_SEGUNDOS = float(os.environ.get('BRAGANTINO_SNAPSHOT_ESPERA_REMOCAO', 10 * 60))
+
+# Uma escrita de snapshot por posição de cada vez neste processo (as sessões do Streamlit são
+# threads); entre processos, os temporários têm nomes próprios e a versão já gravada por
+# outro processo é aceita como está
+_travas_posicao = {}
+# Matrizes abertas neste processo por (posição, versão), que impedem a remoção da versão
+_versoes_abertas = Counter()
+_trava = threading.Lock()
+
+# Nome de diretório sem acentos para cada posição ('Meio-campista' -> 'meio-campista')
+def _nome_diretorio(posicao):
+    sem_acentos = unicodedata.normalize('NFKD', posicao).encode('ascii', 'ignore').decode()
+    return sem_acentos.lower().replace(' ', '-')
+
+def _diretorio_posicao(posicao):
+    return os.path.join(DIRETORIO_SNAPSHOTS, _nome_diretorio(posicao))
+
+# Hash que identifica a versão dos dados brutos (conteúdo e colunas de cada fonte), do formato
+# e do tipo da matriz (o modo compacto grava snapshots próprios). Cada posição usa só as suas
+# fontes, então uma mudança nos goleiros não invalida os snapshots dos jogadores de linha.
+def versao_dados(fontes):
+    h = hashlib.sha256(f'formato {FORMATO_SNAPSHOT} {np.dtype(TIPO_METRICAS).name}'.encode())
+    for nome in sorted(fontes):
+        df = fontes[nome]
+        h.update(nome.encode())
+        h.update('\x1f'.join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+# Diretório com os arquivos de uma versão do snapshot de uma posição
+def diretorio_versao(posicao, versao):
+    return os.path.join(_diretorio_posicao(posicao), versao)
+
+def _trava_posicao(posicao):
+    with _trava:
+        return _travas_posicao.setdefault(posicao, threading.Lock())
+
+def _temporario(caminho):
+    return f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+def _escrever_json_atomico(caminho, conteudo):
+    temporario = _temporario(caminho)
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+def _ler_json(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+# Escreve o snapshot de uma posição: matriz numérica contígua (.npy), metadados, manifesto
+# e, se informados, os normalizadores (mínimos e máximos por liga) usados na posição.
+# No modo compacto a matriz é float32 e os textos repetidos dos metadados são categorias.
+def escrever_snapshot(df_final, posicao, versao, normalizadores=None):
+    with _trava_posicao(posicao):
+        return _escrever_snapshot(df_final, posicao, versao, normalizadores)
+
+def _escrever_snapshot(df_final, posicao, versao, normalizadores):
+    diretorio = _diretorio_posicao(posicao)
+    destino = diretorio_versao(posicao, versao)
+    caminho_manifesto = os.path.join(destino, 'manifesto.json')
+
+    if os.path.exists(caminho_manifesto):
+        # Mesma versão dos dados: só renova a validade, preservando os artefatos
+        # derivados da versão (ex.: índice de vizinhos)
+        manifesto = _ler_json(caminho_manifesto)
+        manifesto['criado_em'] = time.time()
+        _escrever_json_atomico(caminho_manifesto, manifesto)
+    else:
+        colunas_numericas = df_final.select_dtypes(include='number').columns.tolist()
+        colunas_metadados = [col for col in df_final.columns if col not in colunas_numericas]
+
+        # Cada versão vai para um subdiretório próprio, escrito em um diretório temporário
+        # e renomeado ao final; o arquivo ATUAL é trocado por último
+        temporario = _temporario(destino)
+        os.makedirs(temporario, exist_ok=True)
+
+        matriz = np.ascontiguousarray(df_final[colunas_numericas].to_numpy(dtype=TIPO_METRICAS))
+        np.save(os.path.join(temporario, 'matriz.npy'), matriz)
+        metadados = df_final[colunas_metadados].reset_index(drop=True)
+        if MODO_COMPACTO:
+            metadados = compactar(metadados)
+        metadados.to_pickle(os.path.join(temporario, 'metadados.pkl'))
+        if normalizadores is not None:
+            salvar_normalizadores(normalizadores, os.path.join(temporario, 'normalizadores.json'))
+
+        manifesto = {
+            'posicao': posicao,
+            'versao': versao,
+            'criado_em': time.time(),
+            'linhas': int(matriz.shape[0]),
+            'tipo_matriz': matriz.dtype.name,
+            'colunas': df_final.columns.tolist(),
+            'colunas_numericas': colunas_numericas,
+            'colunas_metadados': colunas_metadados,
+        }
+        _escrever_json_atomico(os.path.join(temporario, 'manifesto.json'), manifesto)
+        try:
+            os.replace(temporario, destino)
+        except OSError:
+            # Outro processo gravou a mesma versão antes: os dados são os mesmos
+            shutil.rmtree(temporario, ignore_errors=True)
+            if not os.path.exists(caminho_manifesto):
+                raise
+            manifesto = _ler_json(caminho_manifesto)
+
+    caminho_atual = os.path.join(diretorio, 'ATUAL')
+    anterior = _ler_atual(diretorio)
+    temporario = _temporario(caminho_atual)
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(versao)
+    os.replace(temporario, caminho_atual)
+    if anterior is not None and anterior != versao and os.path.isdir(os.path.join(diretorio, anterior)):
+        # Marca o instante em que a versão anterior deixou de ser a atual
+        os.utime(os.path.join(diretorio, anterior))
+    _remover_versoes_antigas(posicao, versao)
+    return manifesto
+
+# Remove as versões antigas da posição substituídas há mais de ESPERA_REMOCAO_SEGUNDOS e sem
+# matriz aberta neste processo; as demais ficam para uma escrita seguinte
+def _remover_versoes_antigas(posicao, atual):
+    diretorio = _diretorio_posicao(posicao)
+    limite = time.time() - ESPERA_REMOCAO_SEGUNDOS
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if nome == atual or nome.endswith('.tmp') or not os.path.isdir(caminho):
+            continue
+        with _trava:
+            em_uso = _versoes_abertas[(posicao, nome)] > 0
+        if not em_uso and os.path.getmtime(caminho) < limite:
+            shutil.rmtree(caminho, ignore_errors=True)
+
+def _ler_atual(diretorio):
+    caminho_atual = os.path.join(diretorio, 'ATUAL')
+    if not os.path.exists(caminho_atual):
+        return None
+    with open(caminho_atual, encoding='utf-8') as f:
+        return f.read().strip()
+
+def _liberar_versao(chave):
+    with _trava:
+        _versoes_abertas[chave] -= 1
+        if _versoes_abertas[chave] <= 0:
+            del _versoes_abertas[chave]
+
+# Lê o manifesto do snapshot atual de uma posição (ou None se não existir)
+def ler_manifesto(posicao):
+    diretorio = _diretorio_posicao(posicao)
+    versao = _ler_atual(diretorio)
+    if versao is None:
+        return None
+    return _ler_json(os.path.join(diretorio, versao, 'manifesto.json'))
+
+# Abre o snapshot de uma posição com a matriz mapeada em memória; devolve (DataFrame, manifesto).
+# As colunas em 'excluir' não são lidas, evitando copiar colunas que a página descarta.
+def abrir_snapshot(posicao, ttl=None, excluir=()):
+    manifesto = ler_manifesto(posicao)
+    if manifesto is None:
+        return None, None
+    if ttl is not None and time.time() - manifesto['criado_em'] > ttl:
+        return None, manifesto
+
+    diretorio = diretorio_versao(posicao, manifesto['versao'])
+    matriz = np.load(os.path.join(diretorio, 'matriz.npy'), mmap_mode='r')
+    # A versão fica protegida da remoção enquanto a matriz mapeada existir
+    chave = (posicao, manifesto['versao'])
+    with _trava:
+        _versoes_abertas[chave] += 1
+    weakref.finalize(matriz, _liberar_versao, chave)
+    metadados = pd.read_pickle(os.path.join(diretorio, 'metadados.pkl'))
+    colunas_numericas = manifesto['colunas_numericas']
+    if excluir:
+        mantidas = [i for i, col in enumerate(colunas_numericas) if col not in excluir]
+        if len(mantidas) < len(colunas_numericas):
+            matriz = matriz[:, mantidas]
+            colunas_numericas = [colunas_numericas[i] for i in mantidas]
+        metadados = metadados.drop(columns=list(excluir), errors='ignore')
+    df_numerico = pd.DataFrame(matriz, columns=colunas_numericas)
+    colunas = [col for col in manifesto['colunas'] if col not in excluir]
+    df_final = pd.concat([metadados, df_numerico], axis=1)[colunas]
+    df_final.attrs[ATRIBUTO_VERSAO] = f"{posicao}:{manifesto['versao']}"
+    return df_final, manifesto
+
+# Descarta o snapshot atual das posições: a próxima leitura reconstrói a posição a partir das
+# fontes (índices e percentis da versão são refeitos junto). O diretório da versão descartada
+# fica para a remoção adiada, como o de uma versão substituída.
+def invalidar_snapshots(posicoes=POSICOES):
+    for posicao in posicoes:
+        with _trava_posicao(posicao):
+            diretorio = _diretorio_posicao(posicao)
+            versao = _ler_atual(diretorio)
+            if versao is None:
+                continue
+            os.remove(os.path.join(diretorio, 'ATUAL'))
+            if os.path.isdir(os.path.join(diretorio, versao)):
+                os.utime(os.path.join(diretorio, versao))
+
+# Normalizadores gravados no snapshot atual de uma posição ({liga: Normalizador}), para
+# transformar novos jogadores com a mesma escala sem reajustar (ou None se não houver)
+def carregar_normalizadores(posicao):
+    manifesto = ler_manifesto(posicao)
+    if manifesto is None:
+        return None
+    caminho = os.path.join(diretorio_versao(posicao, manifesto['versao']), 'normalizadores.json')
+    return ler_normalizadores(caminho) if os.path.exists(caminho) else None
+
+# Ajusta os normalizadores da posição, normaliza e grava o snapshot
+def _gerar_snapshot(fontes_preparadas, posicao, versao):
+    normalizadores = ajustar_normalizadores(fontes_preparadas, posicao)
+    df_final = preparar_posicao(fontes_preparadas, posicao, normalizadores)
+    with etapa('escrever_snapshot', posicao=posicao):
+        escrever_snapshot(df_final, posicao, versao, normalizadores)
+    return df_final
+
+# Executa a cadeia de pré-processamento uma vez e grava um snapshot por posição
+# (uma única posição lê e prepara apenas as fontes dela)
+def executar_ingestao(fontes=None, posicoes=POSICOES):
+    posicao_unica = posicoes[0] if len(posicoes) == 1 else None
+    if fontes is None:
+        fontes = carregar_fontes(None if posicao_unica is None else fontes_posicao(posicao_unica))
+    fontes_preparadas = preparar_fontes(fontes, posicao_unica)
+    for posicao in posicoes:
+        versao = versao_dados({nome: fontes[nome] for nome in fontes_posicao(posicao)})
+        _gerar_snapshot(fontes_preparadas, posicao, versao)
+    return [ler_manifesto(posicao) for posicao in posicoes]
+
+# Mesma representação do snapshot para uma tabela reconstruída agora (compacta ou não)
+def _representacao(df_final, excluir, posicao, versao):
+    df_final = df_final.drop(columns=list(excluir), errors='ignore')
+    df_final = compactar(df_final) if MODO_COMPACTO else df_final
+    df_final.attrs[ATRIBUTO_VERSAO] = f'{posicao}:{versao}'
+    return df_final
+
+# DataFrame normalizado de uma posição: usa o snapshot se estiver válido, senão reconstrói
+# lendo só as fontes e preparando só as linhas da posição.
+# 'excluir' lista colunas que a página não usa e que nem chegam a ser carregadas.
+def carregar_posicao(posicao, ttl=None, excluir=()):
+    ttl = TTL_SEGUNDOS if ttl is None else ttl
+    with etapa('abrir_snapshot', posicao=posicao) as registro:
+        df_final, _ = abrir_snapshot(posicao, ttl=ttl, excluir=excluir)
+        registro['cache'] = 'miss' if df_final is None else 'hit'
+        if df_final is not None:
+            registro.update(formato(df_final))
+    if df_final is not None:
+        return df_final
+
+    fontes = carregar_fontes(fontes_posicao(posicao))
+    versao = versao_dados(fontes)
+    with etapa('preparar_fontes'):
+        fontes_preparadas = preparar_fontes(fontes, posicao)
+    # Só posições conhecidas ganham snapshot (ex.: a seleção vazia da página não é gravada)
+    if posicao in POSICOES:
+        return _representacao(_gerar_snapshot(fontes_preparadas, posicao, versao), excluir, posicao, versao)
+    return _representacao(preparar_posicao(fontes_preparadas, posicao), excluir, posicao, versao)
@@ -0,0 +1,75 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from perfil_execucao import com_contexto
+
+# Pool de trabalho compartilhado por todas as sessões do processo para os cálculos pesados
+# das páginas. O tamanho limita quantos cálculos disputam a CPU ao mesmo tempo; as demais
+# tarefas esperam na fila. Threads bastam porque o NumPy libera o GIL nas operações sobre
+# as matrizes, e evitam copiar as tabelas para outros processos.
+TRABALHADORES = int(os.environ.get('BRAGANTINO_TRABALHADORES', os.cpu_count() or 1))
+
+_executor = None
+_trava = threading.Lock()
+_FIM = object()
+
+def _obter_executor():
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix='trabalho')
+        return _executor
+
+# Executa funcao(*args) no pool sem que a página espere pelo resultado (ex.: pré-cálculos
+# usados pelas próximas execuções); devolve o Future
+def em_segundo_plano(funcao, *args):
+    return _obter_executor().submit(com_contexto(funcao), *args)
+
+# Tarefa no pool: gerar() devolve um gerador de resultados parciais, consumidos na ordem
+# em que ficam prontos com parciais(). cancelar() tira a tarefa da fila ou a interrompe no
+# próximo parcial.
+class Tarefa:
+    def __init__(self, gerar):
+        self._cancelada = threading.Event()
+        self._fila = queue.Queue()
+        self._futuro = _obter_executor().submit(com_contexto(self._executar), gerar)
+
+    def _executar(self, gerar):
+        try:
+            if self._cancelada.is_set():
+                return
+            gerador = gerar()
+            try:
+                for parcial in gerador:
+                    self._fila.put(parcial)
+                    if self._cancelada.is_set():
+                        return
+            finally:
+                gerador.close()
+        finally:
+            self._fila.put(_FIM)
+
+    def cancelar(self):
+        self._cancelada.set()
+        self._futuro.cancel()
+
+    def concluida(self):
+        return self._futuro.done()
+
+    # Resultados parciais; quando nada chega em 'espera' segundos gera None, para quem
+    # consome poder reagir (ex.: a página ser interrompida). Erros da tarefa são relançados.
+    def parciais(self, espera=0.25):
+        while True:
+            try:
+                parcial = self._fila.get(timeout=espera)
+            except queue.Empty:
+                if self._futuro.cancelled():
+                    return
+                yield None
+                continue
+            if parcial is _FIM:
+                break
+            yield parcial
+        self._futuro.result()
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Os módulos do site leem as configurações do ambiente ao serem importados: o cache vai para um
+# diretório temporário e a preparação das ligas roda no próprio processo
+os.environ.setdefault('BRAGANTINO_CACHE_DIR', tempfile.mkdtemp(prefix='bragantino-testes-'))
+os.environ.setdefault('BRAGANTINO_PROCESSOS', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fontes sintéticas (gerador_dados) já com o esquema dos dados aplicado, como na leitura dos CSVs
+@pytest.fixture(scope='session')
+def fontes():
+    from esquema import aplicar_esquema
+    from gerador_dados import gerar_fontes
+
+    return {nome: aplicar_esquema(df)[0] for nome, df in gerar_fontes(600, 24, semente=3).items()}
+
+# Tabela normalizada de uma posição, preparada a partir das fontes sintéticas
+@pytest.fixture(scope='session')
+def df_final(fontes):
+    from preprocessamento import fontes_posicao, preparar_fontes, preparar_posicao
+
+    posicao = 'Meio-campista'
+    fontes_da_posicao = {nome: fontes[nome] for nome in fontes_posicao(posicao)}
+    return preparar_posicao(preparar_fontes(fontes_da_posicao, posicao), posicao)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import braycurtis, canberra
+from sklearn.decomposition import PCA
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import StandardScaler
+
+# Implementação original das páginas (uma linha por vez, com scipy e scikit-learn), usada como
+# referência nos testes de equivalência. Os jogadores são identificados pelo nome, como antes.
+
+def _distancia_por_maximo(distancias):
+    distancias = pd.Series(distancias, dtype=float)
+    max_distancia = distancias.replace(np.inf, np.nan).max()
+    distancias = distancias.replace(np.inf, max_distancia)
+    return (1 - distancias / max_distancia).clip(0, 1).values
+
+# Similaridades de todos os jogadores em relação ao jogador escolhido (nome) ou à média de um
+# conjunto de jogadores (lista de nomes), ordenadas pela Similaridade Total
+def calcular_similaridades(df_normalized, jogadores_escolhidos, pesos):
+    numeric_columns = df_normalized.select_dtypes(include='number').columns
+    vetor_pesos = np.array([pesos[col] for col in numeric_columns], dtype=float)
+    escolhidos = [jogadores_escolhidos] if isinstance(jogadores_escolhidos, str) else list(jogadores_escolhidos)
+    selecionados = df_normalized['Nome do jogador'].isin(escolhidos)
+    consulta = df_normalized.loc[selecionados, numeric_columns].mean().values.astype(float) * vetor_pesos
+    candidatos = df_normalized.loc[~selecionados]
+    valores = candidatos[numeric_columns].to_numpy(dtype=float) * vetor_pesos
+
+    bray_curtis, euclidiana, manhattan, canberra_, kulczynski = [], [], [], [], []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for linha in valores:
+            bray_curtis.append(np.clip(1 - braycurtis(consulta, linha), 0, 1))
+            euclidiana.append(np.linalg.norm(consulta - linha))
+            manhattan.append(np.sum(np.abs(consulta - linha)))
+            distancia = canberra(consulta, linha)
+            canberra_.append(np.inf if np.isnan(distancia) else distancia)
+            total = consulta + linha
+            razoes = np.where(total != 0, np.abs(consulta - linha) / total, 0)
+            kulczynski.append(np.clip(1 - np.nanmean(razoes), 0, 1))
+
+    df_similaridade = pd.DataFrame({
+        'Nome do jogador': candidatos['Nome do jogador'].values,
+        'Similaridade de Bray-Curtis': bray_curtis,
+        'Similaridade Euclidiana': _distancia_por_maximo(euclidiana),
+        'Similaridade Cosseno': np.clip(cosine_similarity(valores, consulta.reshape(1, -1)).ravel(), 0, 1),
+        'Similaridade Manhattan': _distancia_por_maximo(manhattan),
+        'Similaridade Canberra': _distancia_por_maximo(canberra_),
+        'Similaridade Kulczynski': kulczynski,
+    })
+    df_similaridade['Similaridade Total'] = ((
+        df_similaridade['Similaridade de Bray-Curtis'] * 5
+        + df_similaridade.iloc[:, 2:].fillna(0).sum(axis=1)
+    ) / 10).clip(0, 1)
+    return df_similaridade.sort_values(by='Similaridade Total', ascending=False).reset_index(drop=True)
+
+# Normalização min-max das colunas numéricas para [0.01, 1]
+def normalize_df(df):
+    a = 0.01
+    df_normalized = df.copy()
+    for col in df.select_dtypes(include='number').columns:
+        col_min, col_max = df[col].min(), df[col].max()
+        if col_max - col_min != 0:
+            df_normalized[col] = a + ((df[col] - col_min) / (col_max - col_min)) * (1 - a)
+        else:
+            df_normalized[col] = a
+    return df_normalized
+
+# Primeiro componente principal de cada agrupamento, reescalado para [0.01, 1]
+def aplicar_pca(df, agrupamentos):
+    pca_result = pd.DataFrame(df['Nome do jogador'], columns=['Nome do jogador'])
+    for key, columns in agrupamentos.items():
+        if columns:
+            componente = PCA(n_components=1).fit_transform(StandardScaler().fit_transform(df[columns]))[:, 0]
+            amplitude = componente.max() - componente.min()
+            if amplitude != 0:
+                pca_result[key] = 0.01 + ((componente - componente.min()) / amplitude) * (1 - 0.01)
+            else:
+                pca_result[key] = np.full_like(componente, 0.01)
+    return pca_result
+
+# Percentil médio ponderado de cada jogador na posição, com DataFrame.rank(pct=True)
+def classificar_por_percentil(df, pesos):
+    percentis = df[list(pesos)].rank(pct=True)
+    w = pd.Series(pesos, dtype=float)
+    total = (percentis * w).sum(axis=1) / percentis.notna().mul(w).sum(axis=1)
+    return pd.DataFrame({'Nome do jogador': df['Nome do jogador'], 'Classificação': total})
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from agrupamento import aplicar_pca, nomes_invalidos
+from preprocessamento import COLUNA_ID
+
+import referencia
+
+def test_pca_igual_a_implementacao_original(df_final):
+    colunas = df_final.select_dtypes(include='number').columns[:9].tolist()
+    agrupamentos = {'Criação': colunas[:4], 'Defesa': colunas[4:7], 'Único': colunas[7:8], 'Vazio': []}
+
+    resultado = aplicar_pca(df_final[[COLUNA_ID, 'Nome do jogador'] + colunas], agrupamentos)
+    esperado = referencia.aplicar_pca(df_final, agrupamentos)
+
+    pd.testing.assert_frame_equal(resultado.drop(columns=[COLUNA_ID]), esperado, check_exact=False, rtol=1e-7, atol=1e-9)
+
+@pytest.mark.parametrize('nome', [COLUNA_ID, 'Nome do jogador'])
+def test_agrupamento_nao_sobrescreve_a_identificacao(df_final, nome):
+    colunas = df_final.select_dtypes(include='number').columns[:3].tolist()
+    with pytest.raises(ValueError):
+        aplicar_pca(df_final[[COLUNA_ID, 'Nome do jogador'] + colunas], {nome: colunas})
+
+def test_nomes_invalidos_incluem_as_colunas_informadas():
+    assert nomes_invalidos(['Gols', 'Criação', 'Nome do jogador'], ['Gols', 'Assistências']) == ['Gols', 'Nome do jogador']
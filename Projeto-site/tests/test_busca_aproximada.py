@@ -0,0 +1,43 @@
+import pandas as pd
+
+import busca_aproximada
+from busca_aproximada import calcular_similaridades_aproximadas
+from motor_similaridade import calcular_similaridades
+from preprocessamento import ATRIBUTO_VERSAO, COLUNA_ID
+
+def _tabela(df_final):
+    colunas = df_final.select_dtypes(include='number').columns[:10].tolist()
+    df_normalized = df_final[[COLUNA_ID, 'Nome do jogador'] + colunas].copy()
+    df_normalized.attrs[ATRIBUTO_VERSAO] = 'teste:ivf'
+    return df_normalized, colunas
+
+def test_pesos_diferentes_reaproveitam_o_indice(df_final, monkeypatch):
+    monkeypatch.setattr(busca_aproximada, 'MIN_JOGADORES_INDICE', 0)
+    monkeypatch.setattr(busca_aproximada, '_indices', busca_aproximada.OrderedDict())
+    df_normalized, colunas = _tabela(df_final)
+    jogador = df_normalized[COLUNA_ID].iloc[5]
+
+    for i in range(3):
+        calcular_similaridades_aproximadas(df_normalized, jogador, {col: 1 + (j + i) % 4 for j, col in enumerate(colunas)})
+
+    assert len(busca_aproximada._indices) == 1
+
+def test_todas_as_particoes_igual_a_busca_exata(df_final, monkeypatch):
+    monkeypatch.setattr(busca_aproximada, 'MIN_JOGADORES_INDICE', 0)
+    df_normalized, colunas = _tabela(df_final)
+    pesos = {col: 1 + j % 3 for j, col in enumerate(colunas)}
+    jogadores = df_normalized[COLUNA_ID].iloc[[1, 9]].tolist()
+
+    resultado = calcular_similaridades_aproximadas(df_normalized, jogadores, pesos, n_sondas=len(df_normalized))
+
+    pd.testing.assert_frame_equal(resultado, calcular_similaridades(df_normalized, jogadores, pesos, cache=False))
+
+def test_pesos_diferentes_com_candidatos_fixos_igual_a_busca_exata(df_final, monkeypatch):
+    monkeypatch.setattr(busca_aproximada, 'MIN_JOGADORES_INDICE', 0)
+    df_normalized, colunas = _tabela(df_final)
+    jogador = df_normalized[COLUNA_ID].iloc[4]
+
+    for pesos in ({col: 1 for col in colunas}, {col: 1 + 4 * (j % 2) for j, col in enumerate(colunas)}):
+        resultado = calcular_similaridades_aproximadas(df_normalized, jogador, pesos, n_sondas=3, n_candidatos=40)
+        candidatos = df_normalized[df_normalized[COLUNA_ID].isin(list(resultado[COLUNA_ID]) + [jogador])]
+        pd.testing.assert_frame_equal(resultado, calcular_similaridades(candidatos, jogador, pesos, cache=False))
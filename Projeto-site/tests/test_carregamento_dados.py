@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import carregamento_dados
+import snapshots
+from preprocessamento import fontes_posicao
+
+@pytest.fixture
+def downloads(monkeypatch):
+    chamadas = []
+    liberar = threading.Event()
+    liberar.set()
+
+    def atualizar(nome, agora):
+        chamadas.append(nome)
+        liberar.wait(10)
+        return agora, pd.DataFrame({'Nome do jogador': [nome]})
+
+    monkeypatch.setattr(carregamento_dados, '_atualizar_fonte', atualizar)
+    monkeypatch.setattr(carregamento_dados, '_cache_memoria', {})
+    return chamadas, liberar
+
+def test_requisitar_exige_ao_menos_uma_tentativa():
+    with pytest.raises(ValueError):
+        carregamento_dados._requisitar('http://127.0.0.1:9/fonte.csv', {}, tentativas=0)
+
+def test_sessoes_simultaneas_baixam_a_fonte_uma_vez(downloads):
+    chamadas, liberar = downloads
+    liberar.clear()
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(carregamento_dados.carregar_fontes(['df_teste_unica'])))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    liberar.set()
+    for thread in threads:
+        thread.join()
+
+    assert chamadas == ['df_teste_unica']
+    assert len(resultados) == 4
+
+def test_fonte_lenta_nao_bloqueia_fontes_em_cache(downloads):
+    _, liberar = downloads
+    carregamento_dados._cache_memoria['df_teste_rapida'] = (time.time(), pd.DataFrame({'Nome do jogador': ['a']}))
+    liberar.clear()
+    lenta = threading.Thread(target=carregamento_dados.carregar_fontes, args=(['df_teste_lenta'],))
+    lenta.start()
+    time.sleep(0.1)
+    try:
+        inicio = time.perf_counter()
+        fontes = carregamento_dados.carregar_fontes(['df_teste_rapida'])
+        assert time.perf_counter() - inicio < 1
+        assert fontes['df_teste_rapida']['Nome do jogador'].tolist() == ['a']
+    finally:
+        liberar.set()
+        lenta.join()
+
+def test_falha_de_download_serve_copia_vencida_sem_repetir_a_rede(monkeypatch):
+    nome = 'df_teste_fora_do_ar'
+    tentativas = []
+
+    def requisitar(url, validadores):
+        tentativas.append(url)
+        raise carregamento_dados.requests.ConnectionError('fora do ar')
+
+    monkeypatch.setattr(carregamento_dados, 'FONTES', {nome: 'http://127.0.0.1:9/fonte.csv'})
+    monkeypatch.setattr(carregamento_dados, '_requisitar', requisitar)
+    monkeypatch.setattr(carregamento_dados, '_cache_memoria', {})
+    monkeypatch.setattr(carregamento_dados, '_falhas', {})
+    carregamento_dados._salvar_disco(nome, pd.DataFrame({'Nome do jogador': ['a']}))
+    os.utime(carregamento_dados._caminho_disco(nome), (0, 0))
+
+    for _ in range(3):
+        fontes = carregamento_dados.carregar_fontes([nome], ttl=60)
+        assert fontes[nome]['Nome do jogador'].tolist() == ['a']
+    assert len(tentativas) == 1
+
+    # Passada a espera, a rede volta a ser consultada
+    monkeypatch.setattr(carregamento_dados, 'ESPERA_APOS_FALHA_SEGUNDOS', -1)
+    carregamento_dados.carregar_fontes([nome], ttl=60)
+    assert len(tentativas) == 2
+
+def test_invalidar_cache_descarta_os_snapshots_das_posicoes(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+    snapshots.escrever_snapshot(df_final, 'Goleiro', 'v1')
+
+    carregamento_dados.invalidar_cache(fontes_posicao('Meio-campista')[:1])
+
+    assert snapshots.ler_manifesto('Meio-campista') is None
+    assert snapshots.ler_manifesto('Goleiro') is not None
+
+# Servidor HTTP local que faz o papel das fontes: ETag/Last-Modified, 304 para requisições
+# condicionais e um modo de falha (500)
+class _Fonte:
+    def __init__(self):
+        self.corpo = b''
+        self.etag = None
+        self.falhar = False
+        self.requisicoes = []
+
+    def publicar(self, df, etag):
+        self.corpo = df.to_csv(index=False).encode('utf-8')
+        self.etag = etag
+
+@pytest.fixture
+def servidor_fontes(monkeypatch):
+    fonte = _Fonte()
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            fonte.requisicoes.append(dict(self.headers))
+            if fonte.falhar:
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if self.headers.get('If-None-Match') == fonte.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', fonte.etag)
+            self.send_header('Last-Modified', 'Sun, 18 Oct 2026 08:00:00 GMT')
+            self.send_header('Content-Length', str(len(fonte.corpo)))
+            self.end_headers()
+            self.wfile.write(fonte.corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manipulador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    nome = f'df_teste_http_{id(fonte)}'
+    monkeypatch.setattr(carregamento_dados, 'FONTES', {nome: f'http://127.0.0.1:{servidor.server_port}/{nome}.csv'})
+    monkeypatch.setattr(carregamento_dados, '_cache_memoria', {})
+    monkeypatch.setattr(carregamento_dados, '_falhas', {})
+    monkeypatch.setattr(carregamento_dados, 'TENTATIVAS', 1)
+    yield nome, fonte
+    servidor.shutdown()
+    servidor.server_close()
+    carregamento_dados.invalidar_cache([nome])
+
+def _jogadores(*nomes):
+    return pd.DataFrame({
+        'Nome do jogador': list(nomes), 'Posição do jogador': ['Atacante'] * len(nomes),
+        'Minutos jogados': [90.0] * len(nomes), 'Gols': [1.0] * len(nomes),
+    })
+
+def test_revalidacao_com_304_reaproveita_a_copia_em_disco(servidor_fontes):
+    nome, fonte = servidor_fontes
+    fonte.publicar(_jogadores('a', 'b'), '"v1"')
+
+    primeira = carregamento_dados.carregar_fontes([nome], ttl=-1)[nome]
+    os.utime(carregamento_dados._caminho_disco(nome), (0, 0))
+    segunda = carregamento_dados.carregar_fontes([nome], ttl=-1)[nome]
+
+    assert [requisicao.get('If-None-Match') for requisicao in fonte.requisicoes] == [None, '"v1"']
+    assert fonte.requisicoes[1]['If-Modified-Since'] == 'Sun, 18 Oct 2026 08:00:00 GMT'
+    pd.testing.assert_frame_equal(segunda, primeira)
+    # A cópia em disco ganha nova validade
+    assert time.time() - os.path.getmtime(carregamento_dados._caminho_disco(nome)) < 60
+
+def test_nova_etag_baixa_o_conteudo_novo(servidor_fontes):
+    nome, fonte = servidor_fontes
+    fonte.publicar(_jogadores('a'), '"v1"')
+    carregamento_dados.carregar_fontes([nome], ttl=-1)
+    fonte.publicar(_jogadores('a', 'c'), '"v2"')
+
+    df = carregamento_dados.carregar_fontes([nome], ttl=-1)[nome]
+
+    assert df['Nome do jogador'].tolist() == ['a', 'c']
+    assert carregamento_dados._ler_validadores(nome)['ETag'] == '"v2"'
+
+def test_falha_no_servidor_usa_copia_vencida_e_espera_para_tentar_de_novo(servidor_fontes):
+    nome, fonte = servidor_fontes
+    fonte.publicar(_jogadores('a'), '"v1"')
+    carregamento_dados.carregar_fontes([nome], ttl=-1)
+    fonte.falhar = True
+
+    for _ in range(3):
+        df = carregamento_dados.carregar_fontes([nome], ttl=-1)[nome]
+        assert df['Nome do jogador'].tolist() == ['a']
+
+    # Um download inicial e uma única tentativa depois da falha, dentro da espera
+    assert len(fonte.requisicoes) == 2
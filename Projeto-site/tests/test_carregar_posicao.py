@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+import snapshots
+from preprocessamento import fontes_posicao, preparar_fontes, preparar_posicao
+
+@pytest.mark.parametrize('posicao', ['Goleiro', 'Atacante'])
+def test_posicao_carrega_so_as_proprias_fontes(fontes, tmp_path, monkeypatch, posicao):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    pedidas = []
+
+    def carregar_fontes(nomes=None, ttl=None):
+        pedidas.append(list(nomes))
+        return {nome: fontes[nome].copy() for nome in nomes}
+
+    monkeypatch.setattr(snapshots, 'carregar_fontes', carregar_fontes)
+
+    df_posicao = snapshots.carregar_posicao(posicao)
+
+    assert pedidas == [fontes_posicao(posicao)]
+    # Mesmo resultado que preparar todas as fontes e filtrar a posição depois
+    esperado = preparar_posicao(preparar_fontes({nome: df.copy() for nome, df in fontes.items()}), posicao)
+    pd.testing.assert_frame_equal(df_posicao.reset_index(drop=True), esperado.reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from carregamento_dados import ler_csv_esquema
+from esquema import aplicar_esquema
+
+def _fonte():
+    return pd.DataFrame({
+        'Nome do jogador': ['a', 'b', 'c'],
+        'Posição do jogador': ['Meio-campista'] * 3,
+        'Minutos jogados': [900, 450, 90],
+        'Pé preferido': ['Direito', 'Esquerdo', '-'],
+        'Gols': ['1', '-', 'x'],
+    })
+
+def _verificar(df, divergencias):
+    assert 'Pé preferido' not in df.columns
+    assert divergencias['colunas_descartadas'] == ['Pé preferido']
+    # Uma métrica com algum valor numérico continua sendo métrica, com os inválidos relatados
+    assert df['Gols'].tolist() == [1.0, 0.0, 0.0]
+    assert divergencias['valores_invalidos'] == {'Gols': 1}
+
+def test_coluna_de_texto_fora_do_esquema_e_descartada():
+    _verificar(*aplicar_esquema(_fonte()))
+
+def test_coluna_de_texto_fora_do_esquema_e_descartada_na_leitura(tmp_path):
+    caminho = tmp_path / 'fonte.csv'
+    _fonte().to_csv(caminho, index=False)
+    _verificar(*ler_csv_esquema(str(caminho)))
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from exportacao import blocos_matriz_similaridade, blocos_tabela, escrever_blocos
+from motor_similaridade import calcular_similaridades
+from preprocessamento import COLUNA_ID
+
+def _tabela(df_final):
+    colunas = df_final.select_dtypes(include='number').columns[:8].tolist()
+    return df_final[[COLUNA_ID, 'Nome do jogador'] + colunas], {col: 1 + i % 3 for i, col in enumerate(colunas)}
+
+def _ler(caminho, formato):
+    return pd.read_parquet(caminho) if formato == 'parquet' else pd.read_csv(caminho)
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_formato_longo_igual_a_calcular_similaridades(df_final, tmp_path, formato):
+    df_normalized, pesos = _tabela(df_final)
+    jogadores = df_normalized[COLUNA_ID].iloc[:5].tolist()
+    caminho = tmp_path / f'matriz.{formato}'
+
+    # Blocos pequenos: mais de um bloco por arquivo
+    blocos = blocos_matriz_similaridade(df_normalized, pesos, jogadores, linhas_por_bloco=2 * len(df_normalized))
+    linhas = escrever_blocos(blocos, str(caminho))
+
+    lido = _ler(caminho, formato)
+    assert linhas == len(lido) == len(jogadores) * (len(df_normalized) - 1)
+    for jogador, grupo in lido.groupby('ID consultado', sort=False):
+        esperado = calcular_similaridades(df_normalized, jogador, pesos, cache=False)
+        pd.testing.assert_frame_equal(grupo.drop(columns='ID consultado').reset_index(drop=True), esperado,
+                                      check_exact=False, rtol=1e-12, check_dtype=False)
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_formato_largo_igual_a_calcular_similaridades(df_final, tmp_path, formato):
+    df_normalized, pesos = _tabela(df_final)
+    jogadores = df_normalized[COLUNA_ID].iloc[3:7].tolist()
+    caminho = tmp_path / f'matriz_larga.{formato}'
+
+    escrever_blocos(blocos_matriz_similaridade(df_normalized, pesos, jogadores, largo=True,
+                                               linhas_por_bloco=len(df_normalized)), str(caminho))
+
+    lido = _ler(caminho, formato).set_index('ID consultado')
+    assert lido.index.tolist() == jogadores
+    assert lido.columns.tolist() == df_normalized[COLUNA_ID].tolist()
+    for jogador in jogadores:
+        esperado = calcular_similaridades(df_normalized, jogador, pesos, cache=False).set_index(COLUNA_ID)
+        linha = lido.loc[jogador]
+        assert linha[jogador] == 1.0
+        np.testing.assert_allclose(linha[esperado.index].to_numpy(dtype=float), esperado['Similaridade Total'], rtol=1e-12)
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_falha_na_escrita_nao_deixa_arquivo_parcial(df_final, tmp_path, formato):
+    caminho = tmp_path / f'resultado.{formato}'
+    caminho.write_text('exportação anterior')
+
+    def blocos():
+        yield from blocos_tabela(df_final.head(10), linhas_por_bloco=5)
+        raise RuntimeError('falha no meio da exportação')
+
+    with pytest.raises(RuntimeError):
+        escrever_blocos(blocos(), str(caminho))
+
+    # O arquivo anterior continua intacto e o temporário foi removido
+    assert caminho.read_text() == 'exportação anterior'
+    assert os.listdir(tmp_path) == [caminho.name]
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from consultas import resolver_jogador
+from motor_similaridade import JogadorNaoEncontrado
+from preprocessamento import COLUNA_ID, ids_jogadores, preparar_fontes, preparar_liga
+
+def _liga(nomes, times):
+    return pd.DataFrame({
+        'Nome do jogador': nomes, 'Time do jogador': times, 'Posição do jogador': ['Atacante'] * len(nomes),
+        'Minutos jogados': [900.0] * len(nomes),
+    })
+
+def test_mesmo_time_e_nome_em_ligas_diferentes_tem_ids_diferentes():
+    df = _liga(['João', 'Pedro'], ['Nacional', 'Nacional'])
+
+    ids = ids_jogadores(df, 'br').tolist() + ids_jogadores(df, 'arg').tolist()
+
+    assert ids == ['br:Nacional:João', 'br:Nacional:Pedro', 'arg:Nacional:João', 'arg:Nacional:Pedro']
+
+def test_homonimos_no_mesmo_time_recebem_sufixo():
+    ids = ids_jogadores(_liga(['João', 'João', 'Pedro', 'João'], ['Nacional'] * 4), 'br').tolist()
+    assert ids == ['br:Nacional:João', 'br:Nacional:João:2', 'br:Nacional:Pedro', 'br:Nacional:João:3']
+
+def test_ids_unicos_e_estaveis_com_o_filtro_de_posicao(fontes):
+    fontes = dict(fontes)
+    # A mesma tabela em duas ligas: só o prefixo da liga distingue os jogadores
+    fontes['df_jogadores_arg'] = fontes['df_jogadores_br'].copy()
+
+    todas = pd.concat(preparar_fontes(fontes)['jogadores'], ignore_index=True)
+    meio = pd.concat(preparar_fontes(fontes, 'Meio-campista')['jogadores'], ignore_index=True)
+
+    assert todas[COLUNA_ID].is_unique
+    esperado = todas.loc[todas['Posição do jogador'] == 'Meio-campista', COLUNA_ID].tolist()
+    assert meio[COLUNA_ID].tolist() == esperado
+    assert preparar_liga(fontes['df_jogadores_br'], 'br')[COLUNA_ID].str.startswith('br:').all()
+
+def test_resolver_jogador_pelo_id_ou_nome():
+    df = preparar_liga(_liga(['João', 'João', 'Pedro'], ['Nacional', 'Peñarol', 'Nacional']), 'br')
+
+    assert resolver_jogador(df, 'br:Peñarol:João') == 'br:Peñarol:João'
+    assert resolver_jogador(df, 'Pedro') == 'br:Nacional:Pedro'
+    with pytest.raises(ValueError):
+        resolver_jogador(df, 'João')
+    with pytest.raises(JogadorNaoEncontrado):
+        resolver_jogador(df, 'Ninguém')
@@ -0,0 +1,20 @@
+import indice_vizinhos
+import motor_similaridade
+import snapshots
+
+def test_indice_e_construido_em_segundo_plano_sem_usar_o_cache(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    monkeypatch.setattr(indice_vizinhos, '_indices', {})
+    monkeypatch.setattr(indice_vizinhos, '_construcoes', {})
+    monkeypatch.setattr(motor_similaridade, '_consultas', motor_similaridade.OrderedDict())
+    monkeypatch.setattr(motor_similaridade, '_bytes_consultas', 0)
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+
+    # Primeira busca: o índice ainda não existe e a página calcula a consulta diretamente
+    assert indice_vizinhos.carregar_indice('Meio-campista', k=5) is None
+    indice_vizinhos._construcoes[('Meio-campista', 'v1', 5)].result()
+
+    indice = indice_vizinhos.carregar_indice('Meio-campista', k=5)
+    assert len(indice) == len(df_final)
+    assert all(len(vizinhos) == 5 for vizinhos in indice.values())
+    assert not motor_similaridade._consultas
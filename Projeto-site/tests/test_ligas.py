@@ -0,0 +1,51 @@
+import json
+
+import pandas as pd
+import pytest
+
+import preprocessamento
+from ligas import fontes_do_tipo, fontes_manifesto, ler_manifesto_ligas
+
+def _manifesto(tmp_path, ligas):
+    caminho = tmp_path / 'ligas.json'
+    caminho.write_text(json.dumps({'ligas': ligas}), encoding='utf-8')
+    return str(caminho)
+
+def test_manifesto_define_as_fontes_e_urls(tmp_path):
+    manifesto = ler_manifesto_ligas(_manifesto(tmp_path, [
+        {'codigo': 'br', 'nome': 'Brasil', 'jogadores': 'br.csv', 'goleiros': 'br_gk.csv'},
+        {'codigo': 'uru', 'nome': 'Uruguai', 'jogadores': 'https://outro.site/uru.csv'},
+    ]))
+
+    assert fontes_manifesto('https://base', manifesto) == {
+        'df_jogadores_br': 'https://base/br.csv',
+        'df_jogadores_uru': 'https://outro.site/uru.csv',
+        'df_goleiros_br': 'https://base/br_gk.csv',
+    }
+    assert fontes_do_tipo('goleiros', manifesto) == ['df_goleiros_br']
+
+@pytest.mark.parametrize('ligas', [
+    [],
+    [{'codigo': 'br', 'jogadores': 'a.csv'}, {'codigo': 'br', 'jogadores': 'b.csv'}],
+    [{'codigo': 'br'}],
+])
+def test_manifesto_invalido(tmp_path, ligas):
+    with pytest.raises(ValueError):
+        ler_manifesto_ligas(_manifesto(tmp_path, ligas))
+
+def test_pool_de_processos_igual_ao_proprio_processo(fontes, monkeypatch):
+    sequencial = preprocessamento.preparar_fontes(fontes, 'Atacante')['jogadores']
+    monkeypatch.setattr(preprocessamento, 'PROCESSOS', 2)
+    monkeypatch.setattr(preprocessamento, 'MIN_LINHAS_PROCESSOS', 0)
+    monkeypatch.setattr(preprocessamento, '_executor', None)
+    try:
+        paralelo = preprocessamento.preparar_fontes(fontes, 'Atacante')['jogadores']
+        # O pool foi usado (e não descartado por uma falha)
+        assert preprocessamento._executor is not None
+    finally:
+        if preprocessamento._executor is not None:
+            preprocessamento._executor.shutdown()
+
+    assert len(paralelo) == len(sequencial)
+    for df_paralelo, df_sequencial in zip(paralelo, sequencial):
+        pd.testing.assert_frame_equal(df_paralelo, df_sequencial)
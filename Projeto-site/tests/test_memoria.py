@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+import snapshots
+from memoria import compactar, uso_memoria
+from motor_similaridade import calcular_similaridades
+from preprocessamento import COLUNA_ID
+
+def _consulta(df, n_colunas=12):
+    colunas = df.select_dtypes(include='number').columns[:n_colunas].tolist()
+    return df[[COLUNA_ID, 'Nome do jogador'] + colunas], {col: 1 + i % 4 for i, col in enumerate(colunas)}
+
+def test_compactar_reduz_a_memoria_sem_mudar_os_valores(df_final):
+    compacto = compactar(df_final)
+
+    assert uso_memoria(compacto) < uso_memoria(df_final)
+    assert compacto['Time do jogador'].dtype == 'category'
+    assert compacto['Time do jogador'].astype(str).tolist() == df_final['Time do jogador'].tolist()
+    numericas = df_final.select_dtypes(include='float').columns
+    assert (compacto[numericas].dtypes == np.float32).all()
+    np.testing.assert_allclose(compacto[numericas].to_numpy(dtype=float), df_final[numericas].to_numpy(), rtol=1e-6)
+
+def test_similaridades_no_modo_compacto_iguais_ao_float64(df_final):
+    df_normalized, pesos = _consulta(df_final)
+    jogador = df_normalized[COLUNA_ID].iloc[9]
+
+    compacto = calcular_similaridades(_consulta(compactar(df_final))[0], jogador, pesos, cache=False)
+    completo = calcular_similaridades(df_normalized, jogador, pesos, cache=False)
+
+    # A ordem pode mudar entre jogadores empatados dentro da tolerância do float32
+    compacto = compacto.set_index(COLUNA_ID).loc[completo[COLUNA_ID]].reset_index()
+    pd.testing.assert_frame_equal(compacto, completo, check_exact=False, rtol=1e-4, atol=1e-5, check_dtype=False)
+
+def test_snapshot_no_modo_compacto(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    monkeypatch.setattr(snapshots, 'MODO_COMPACTO', True)
+    monkeypatch.setattr(snapshots, 'TIPO_METRICAS', np.float32)
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+
+    df_snapshot, _ = snapshots.abrir_snapshot('Meio-campista')
+
+    numericas = df_final.select_dtypes(include='number').columns
+    assert (df_snapshot[numericas].dtypes == np.float32).all()
+    np.testing.assert_allclose(df_snapshot[numericas].to_numpy(dtype=float), df_final[numericas].to_numpy(), rtol=1e-6)
+    assert df_snapshot['Nome do jogador'].astype(str).tolist() == df_final['Nome do jogador'].tolist()
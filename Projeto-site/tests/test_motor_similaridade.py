@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import motor_similaridade
+from motor_similaridade import calcular_similaridades, similaridades_progressivas
+from preprocessamento import ATRIBUTO_VERSAO, COLUNA_ID
+
+import referencia
+
+def _tabela(df_final, n_colunas=10):
+    colunas = df_final.select_dtypes(include='number').columns[:n_colunas].tolist()
+    return df_final[[COLUNA_ID, 'Nome do jogador'] + colunas], colunas
+
+def _comparar_com_referencia(resultado, esperado):
+    resultado = resultado.drop(columns=[COLUNA_ID]).set_index('Nome do jogador').sort_index()
+    esperado = esperado.set_index('Nome do jogador').sort_index()
+    pd.testing.assert_frame_equal(resultado, esperado[resultado.columns], check_exact=False, rtol=1e-9, atol=1e-12)
+
+@pytest.mark.parametrize('pesos_variados', [False, True])
+def test_um_jogador_igual_a_implementacao_original(df_final, pesos_variados):
+    df_normalized, colunas = _tabela(df_final)
+    pesos = {col: (i % 4 if pesos_variados else 1) for i, col in enumerate(colunas)}
+    linha = 7
+
+    resultado = calcular_similaridades(df_normalized, df_normalized[COLUNA_ID].iloc[linha], pesos)
+    esperado = referencia.calcular_similaridades(df_normalized, df_normalized['Nome do jogador'].iloc[linha], pesos)
+
+    _comparar_com_referencia(resultado, esperado)
+
+def test_multiplos_jogadores_igual_a_implementacao_original(df_final):
+    df_normalized, colunas = _tabela(df_final)
+    pesos = {col: 1 + i % 3 for i, col in enumerate(colunas)}
+    linhas = [2, 11, 40]
+
+    resultado = calcular_similaridades(df_normalized, df_normalized[COLUNA_ID].iloc[linhas].tolist(), pesos)
+    esperado = referencia.calcular_similaridades(df_normalized, df_normalized['Nome do jogador'].iloc[linhas].tolist(), pesos)
+
+    _comparar_com_referencia(resultado, esperado)
+
+def test_progressivo_termina_igual_ao_calculo_direto(df_final):
+    df_normalized, colunas = _tabela(df_final)
+    pesos = {col: 2 for col in colunas}
+    jogador = df_normalized[COLUNA_ID].iloc[0]
+
+    parciais = list(similaridades_progressivas(df_normalized, jogador, pesos, candidatos_por_bloco=50))
+
+    assert len(parciais) > 1
+    assert parciais[-1][0] == parciais[-1][1] == len(df_normalized) - 1
+    pd.testing.assert_frame_equal(parciais[-1][2], calcular_similaridades(df_normalized, jogador, pesos, cache=False))
+
+def test_cache_de_consultas_respeita_o_limite_em_bytes(df_final, monkeypatch):
+    df_normalized, colunas = _tabela(df_final)
+    df_normalized = df_normalized.copy()
+    df_normalized.attrs[ATRIBUTO_VERSAO] = 'teste:limite'
+    pesos = {col: 1 for col in colunas}
+    tamanho = 7 * (len(df_normalized) - 1) * len(colunas) * np.dtype(float).itemsize
+    monkeypatch.setattr(motor_similaridade, 'LIMITE_CACHE_CONSULTAS', int(2.5 * tamanho))
+    monkeypatch.setattr(motor_similaridade, '_consultas', motor_similaridade.OrderedDict())
+    monkeypatch.setattr(motor_similaridade, '_bytes_consultas', 0)
+
+    for jogador in df_normalized[COLUNA_ID].iloc[:4]:
+        calcular_similaridades(df_normalized, jogador, pesos)
+
+    assert len(motor_similaridade._consultas) == 2
+    assert motor_similaridade._bytes_consultas <= motor_similaridade.LIMITE_CACHE_CONSULTAS
+
+def test_cache_de_consultas_usa_a_versao_da_tabela(df_final):
+    df_normalized, colunas = _tabela(df_final)
+    df_normalized = df_normalized.copy()
+    df_normalized.attrs[ATRIBUTO_VERSAO] = 'teste:versao'
+    jogador = df_normalized[COLUNA_ID].iloc[3]
+
+    antes = calcular_similaridades(df_normalized, jogador, {col: 1 for col in colunas})
+    depois = calcular_similaridades(df_normalized[df_normalized.columns[:-1]], jogador, {col: 1 for col in colunas[:-1]})
+
+    # Outras colunas, outra consulta: o resultado não vem da entrada anterior
+    assert not np.allclose(antes['Similaridade Total'].values, depois['Similaridade Total'].values)
+
+def test_cache_de_consultas_distingue_subconjuntos_de_linhas(df_final):
+    df_normalized, colunas = _tabela(df_final)
+    df_normalized = df_normalized.copy()
+    df_normalized.attrs[ATRIBUTO_VERSAO] = 'teste:subconjuntos'
+    pesos = {col: 1 for col in colunas}
+    jogador = df_normalized[COLUNA_ID].iloc[0]
+    # Dois subconjuntos com o mesmo formato, ambos com o jogador escolhido e a versão da tabela
+    metade = len(df_normalized) // 2
+    primeiro = df_normalized.iloc[:metade]
+    segundo = df_normalized.iloc[[0] + list(range(metade, 2 * metade - 1))]
+
+    calcular_similaridades(primeiro, jogador, pesos)
+    resultado = calcular_similaridades(segundo, jogador, pesos)
+
+    pd.testing.assert_frame_equal(resultado, calcular_similaridades(segundo, jogador, pesos, cache=False))
+    assert set(resultado[COLUNA_ID]) == set(segundo[COLUNA_ID].iloc[1:])
+
+def test_progressivo_divide_a_posicao_em_varios_blocos(df_final, monkeypatch):
+    monkeypatch.setattr(motor_similaridade, 'MIN_CANDIDATOS_POR_BLOCO', 10)
+    df_normalized, colunas = _tabela(df_final)
+    df_normalized = df_normalized.copy()
+    df_normalized.attrs.pop(ATRIBUTO_VERSAO, None)
+
+    parciais = list(similaridades_progressivas(df_normalized, df_normalized[COLUNA_ID].iloc[1], {col: 1 for col in colunas}))
+
+    assert len(parciais) == motor_similaridade.BLOCOS_PROGRESSIVOS
+    assert [processados for processados, _, _ in parciais] == sorted({processados for processados, _, _ in parciais})
@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import percentis
+import snapshots
+from percentis import calcular_percentis, classificar_por_percentil, tabela_percentis
+
+import referencia
+
+def test_percentis_iguais_ao_rank_do_pandas(df_final):
+    df = df_final.select_dtypes(include='number').iloc[:, :15].copy()
+    # Empates e valores faltantes
+    df.iloc[::7, 0] = df.iloc[0, 0]
+    df.iloc[::11, 1] = np.nan
+
+    percentis = calcular_percentis(df.to_numpy(dtype=float))
+
+    np.testing.assert_allclose(percentis, df.rank(pct=True).to_numpy(), rtol=1e-12)
+
+def test_classificacao_igual_a_referencia(df_final):
+    colunas = df_final.select_dtypes(include='number').columns[:6].tolist()
+    pesos = {col: 1 + i % 3 for i, col in enumerate(colunas)}
+
+    resultado = classificar_por_percentil(tabela_percentis(df_final), pesos)
+    esperado = referencia.classificar_por_percentil(df_final.reset_index(drop=True), pesos)
+
+    # A tabela guarda os percentis em float32
+    resultado = resultado.set_index('Nome do jogador')['Classificação'].sort_index()
+    esperado = esperado.set_index('Nome do jogador')['Classificação'].sort_index()
+    pd.testing.assert_series_equal(resultado, esperado, check_exact=False, rtol=1e-6)
+
+def test_classificacao_sem_tabela_e_um_erro_claro():
+    with pytest.raises(ValueError):
+        classificar_por_percentil(None, {'Gols': 1})
+
+def test_calculo_de_uma_posicao_nao_bloqueia_as_demais(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    monkeypatch.setattr(percentis, '_tabelas', {})
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+    snapshots.escrever_snapshot(df_final, 'Goleiro', 'v1')
+    liberar, calculando = threading.Event(), threading.Event()
+    construir = percentis.construir_tabela_percentis
+
+    # O cálculo do Goleiro fica parado até o fim do teste (como um início a frio lento)
+    def construir_tabela_percentis(posicao):
+        if posicao == 'Goleiro':
+            calculando.set()
+            liberar.wait(10)
+        return construir(posicao)
+
+    monkeypatch.setattr(percentis, 'construir_tabela_percentis', construir_tabela_percentis)
+    lenta = threading.Thread(target=percentis.carregar_percentis, args=('Goleiro',))
+    lenta.start()
+    try:
+        assert calculando.wait(10)
+        resultado = []
+        rapida = threading.Thread(target=lambda: resultado.append(percentis.carregar_percentis('Meio-campista')))
+        rapida.start()
+        rapida.join(5)
+        assert resultado and len(resultado[0]) == len(df_final)
+    finally:
+        liberar.set()
+        lenta.join()
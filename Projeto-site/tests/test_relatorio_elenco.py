@@ -0,0 +1,40 @@
+import pytest
+
+import relatorio_elenco
+from indice_vizinhos import vizinhos_padrao
+from preprocessamento import COLUNA_ID, POSICOES
+
+@pytest.fixture
+def posicoes(df_final, monkeypatch):
+    dfs = {posicao: df_final.iloc[:0] for posicao in POSICOES}
+    dfs['Meio-campista'] = df_final.reset_index(drop=True)
+    monkeypatch.setattr(relatorio_elenco, '_dfs_posicao', dfs)
+    return dfs['Meio-campista']
+
+def test_substitutos_seguem_a_consulta_padrao(posicoes):
+    jogador = posicoes[COLUNA_ID].iloc[0]
+
+    substitutos = relatorio_elenco.substitutos_jogador(jogador, 'Meio-campista', n=5)
+
+    esperado = vizinhos_padrao(posicoes, jogador, k=5)
+    assert substitutos['Ranking'].tolist() == [1, 2, 3, 4, 5]
+    assert substitutos[COLUNA_ID].tolist() == esperado[COLUNA_ID].tolist()
+    assert (substitutos['ID do jogador do elenco'] == jogador).all()
+
+def test_excluir_time_remove_colegas_do_elenco(posicoes):
+    jogador = posicoes[COLUNA_ID].iloc[0]
+    time = posicoes['Time do jogador'].iloc[0]
+
+    substitutos = relatorio_elenco.substitutos_jogador(jogador, 'Meio-campista', n=20, excluir_time=True)
+
+    assert len(substitutos) == 20
+    assert (substitutos['Time do jogador'] != time).all()
+
+def test_relatorio_localiza_jogadores_e_lista_os_nao_encontrados(posicoes):
+    ids = posicoes[COLUNA_ID].iloc[[1, 2]].tolist()
+
+    relatorio, nao_encontrados = relatorio_elenco.gerar_relatorio(ids + ['Ninguém'], n=3, processos=1)
+
+    assert nao_encontrados == ['Ninguém']
+    assert relatorio.groupby('ID do jogador do elenco').size().to_dict() == {ids[0]: 3, ids[1]: 3}
+    assert (relatorio['Posição'] == 'Meio-campista').all()
@@ -0,0 +1,81 @@
+import threading
+
+import pandas as pd
+import pytest
+import requests
+
+import servico
+import snapshots
+from consultas import jogadores_similares
+from indice_vizinhos import COLUNAS_REMOVIDAS
+from preprocessamento import COLUNA_ID
+
+def test_tabela_de_uma_posicao_nao_espera_a_geracao_de_outra(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+    liberar, abrindo = threading.Event(), threading.Event()
+    abrir = servico.abrir_snapshot
+
+    # Abrir o Goleiro fica parado até o fim do teste (como uma ingestão lenta)
+    def abrir_snapshot(posicao, **kwargs):
+        if posicao == 'Goleiro':
+            abrindo.set()
+            liberar.wait(10)
+            return pd.DataFrame(), {'versao': 'lenta'}
+        return abrir(posicao, **kwargs)
+
+    monkeypatch.setattr(servico, 'abrir_snapshot', abrir_snapshot)
+    tabelas = servico.TabelasPosicao()
+    lenta = threading.Thread(target=tabelas.tabela, args=('Goleiro', ()))
+    lenta.start()
+    try:
+        assert abrindo.wait(10)
+        resultado = []
+        rapida = threading.Thread(target=lambda: resultado.append(tabelas.tabela('Meio-campista', ())))
+        rapida.start()
+        rapida.join(5)
+        assert resultado and len(resultado[0]) == len(df_final)
+    finally:
+        liberar.set()
+        lenta.join()
+
+@pytest.fixture
+def url_servico(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+    servidor = servico.criar_servidor(servico.ServicoConsultas(), '127.0.0.1', 0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{servidor.server_port}'
+    servidor.shutdown()
+    servidor.server_close()
+
+def test_similares_igual_a_consulta_direta(url_servico, df_final):
+    jogador = df_final[COLUNA_ID].iloc[4]
+
+    resposta = requests.post(f'{url_servico}/similares', json={'posicao': 'Meio-campista', 'jogador': jogador, 'n': 10})
+
+    assert resposta.status_code == 200
+    assert 'consulta;dur=' in resposta.headers['Server-Timing']
+    corpo = resposta.json()
+    esperado = jogadores_similares('Meio-campista', jogador, n=10,
+                                   df_final=snapshots.abrir_snapshot('Meio-campista', excluir=COLUNAS_REMOVIDAS)[0])
+    assert corpo['linhas'] == 10
+    pd.testing.assert_frame_equal(pd.DataFrame(corpo['resultado']), esperado, check_exact=False, rtol=1e-12,
+                                  check_dtype=False)
+
+def test_saude(url_servico):
+    resposta = requests.get(f'{url_servico}/saude')
+    assert resposta.status_code == 200
+    assert resposta.json() == {'situacao': 'ok'}
+
+@pytest.mark.parametrize('metodo, rota, corpo, status', [
+    ('get', '/inexistente', None, 404),
+    ('post', '/similares', {'posicao': 'Meio-campista', 'jogador': 'Ninguém'}, 404),
+    ('post', '/similares', {'posicao': 'Lateral', 'jogador': 'Ninguém'}, 400),
+    ('post', '/similares', {'posicao': 'Meio-campista'}, 400),
+    ('post', '/classificacao', {'posicao': 'Meio-campista', 'colunas': ['Coluna inexistente']}, 400),
+])
+def test_erros_mapeados_para_400_e_404(url_servico, metodo, rota, corpo, status):
+    resposta = getattr(requests, metodo)(f'{url_servico}{rota}', json=corpo)
+    assert resposta.status_code == status
+    assert resposta.json()['erro']
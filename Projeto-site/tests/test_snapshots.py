@@ -0,0 +1,50 @@
+import os
+import threading
+
+import pandas as pd
+
+import snapshots
+
+def _executar_em_threads(funcao, n):
+    erros = []
+    barreira = threading.Barrier(n)
+
+    def executar(i):
+        barreira.wait()
+        try:
+            funcao(i)
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return erros
+
+def test_escritas_simultaneas_da_mesma_posicao(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    versoes = ['versao-a', 'versao-b']
+
+    erros = _executar_em_threads(
+        lambda i: snapshots.escrever_snapshot(df_final, 'Meio-campista', versoes[i % 2]), 8
+    )
+
+    assert erros == []
+    df_snapshot, manifesto = snapshots.abrir_snapshot('Meio-campista')
+    assert manifesto['versao'] in versoes
+    pd.testing.assert_frame_equal(df_snapshot, df_final.reset_index(drop=True), check_dtype=False)
+    assert not [nome for nome in os.listdir(tmp_path / 'meio-campista') if nome.endswith('.tmp')]
+
+def test_versao_substituida_so_e_removida_apos_a_espera(df_final, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'DIRETORIO_SNAPSHOTS', str(tmp_path))
+    diretorio = tmp_path / 'meio-campista'
+
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v1')
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v2')
+    assert (diretorio / 'v1').is_dir()
+
+    monkeypatch.setattr(snapshots, 'ESPERA_REMOCAO_SEGUNDOS', -1)
+    snapshots.escrever_snapshot(df_final, 'Meio-campista', 'v3')
+    assert sorted(nome for nome in os.listdir(diretorio) if (diretorio / nome).is_dir()) == ['v3']
@@ -0,0 +1,36 @@
+import threading
+
+import motor_similaridade
+from motor_similaridade import similaridades_progressivas
+from preprocessamento import COLUNA_ID
+from tarefas import Tarefa
+
+def test_cancelar_interrompe_o_calculo_no_meio(df_final, monkeypatch):
+    monkeypatch.setattr(motor_similaridade, 'MIN_CANDIDATOS_POR_BLOCO', 10)
+    colunas = df_final.select_dtypes(include='number').columns[:10].tolist()
+    df_normalized = df_final[[COLUNA_ID, 'Nome do jogador'] + colunas]
+    cancelada = threading.Event()
+    gerados = []
+
+    # Depois do primeiro bloco, o cálculo só continua quando a tarefa já foi cancelada
+    def gerar():
+        for parcial in similaridades_progressivas(df_normalized, df_normalized[COLUNA_ID].iloc[2],
+                                                  {col: 1 for col in colunas}):
+            if gerados:
+                cancelada.wait(10)
+            gerados.append(parcial)
+            yield parcial
+
+    tarefa = Tarefa(gerar)
+    recebidos = []
+    for parcial in tarefa.parciais(espera=0.05):
+        if parcial is not None:
+            recebidos.append(parcial)
+            if len(recebidos) == 1:
+                tarefa.cancelar()
+                cancelada.set()
+
+    assert tarefa.concluida()
+    assert 1 <= len(gerados) < motor_similaridade.BLOCOS_PROGRESSIVOS
+    processados, total, _ = recebidos[-1]
+    assert processados < total